@@ -0,0 +1,35 @@
+# benchmarks/batch_throughput.py (Batched vs one-at-a-time process_images throughput)
+# Usage: python -m benchmarks.batch_throughput [--folder DIR] [--batch-sizes 1 4 16]
+import argparse
+import time
+import config.settings as settings
+settings.CACHE_ENABLED = False  # Before core.model reads it: measure batching, not cache hits
+settings.RESULTS_ENABLED = False  # Benchmark runs are not results worth keeping
+from config.settings import IMAGE_FOLDER, BATCH_SIZE
+from core.model import process_images, list_images
+
+def run(folder_path, batch_sizes, repeats):
+    num_images = len(list_images(folder_path))
+    print(f"{num_images} images in {folder_path}")
+
+    # Warm-up so model initialisation is not charged to the first batch size
+    process_images(folder_path, batch_size=batch_sizes[0])
+
+    baseline = None
+    for batch_size in batch_sizes:
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            process_images(folder_path, batch_size=batch_size)
+            best = min(best, time.perf_counter() - start)
+        throughput = num_images / best if best > 0 else 0.0
+        baseline = baseline or throughput
+        print(f"batch_size={batch_size:<4} {best:8.2f} s  {throughput:8.1f} img/s  x{throughput / baseline:.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare batched and one-at-a-time inference throughput")
+    parser.add_argument("--folder", default=IMAGE_FOLDER)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=sorted({1, BATCH_SIZE}))
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run(args.folder, args.batch_sizes, args.repeats)
@@ -0,0 +1,86 @@
+# benchmarks/display_path.py (Per-frame allocations and render time of the live display path)
+# Usage: python -m benchmarks.display_path [--frames 300] [--width 1280] [--height 720]
+# "before" is the old update_frame path (draw at camera resolution, cv2.resize, cv2.cvtColor,
+# Image.fromarray, new ImageTk.PhotoImage); "after" is core.display (reused buffers, overlay
+# at display size, one PhotoImage pasted in place). The Tk steps are included only when a
+# display is available. Allocations are the peak Python-tracked bytes (numpy buffers and
+# Python objects) allocated while rendering one frame.
+import argparse
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+from benchmarks.suite import fabric_image
+from core.detections import Detections
+from core.display import DisplayBuffer, TkDisplay
+
+DISPLAY_SIZE = (640, 480)
+CLASS_NAMES = ['Hole', 'Stitch', 'Seam']
+
+def render_before(frame, detections, label):
+    detections.draw(frame, CLASS_NAMES)
+    img = Image.fromarray(cv2.cvtColor(cv2.resize(frame, DISPLAY_SIZE), cv2.COLOR_BGR2RGB))
+    if label is not None:
+        img = ImageTk.PhotoImage(image=img)
+        label.config(image=img)
+        label.image = img
+
+def make_render_after(label):
+    if label is None:
+        buffer = DisplayBuffer(DISPLAY_SIZE)
+        return lambda frame, detections, _: buffer.render(frame, detections, CLASS_NAMES)
+    display = TkDisplay(label, DISPLAY_SIZE)
+    return lambda frame, detections, _: display.show(frame, detections, CLASS_NAMES)
+
+def measure(render, frames, detections, label, root):
+    for frame in frames[:5]:  # Warm-up: first-use allocations are not per-frame costs
+        render(frame.copy(), detections, label)
+    times, allocated = [], []
+    tracemalloc.start()
+    for frame in frames:
+        frame = frame.copy()  # The live apps hand the display a frame they no longer need
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        render(frame, detections, label)
+        if root is not None:
+            root.update_idletasks()
+        times.append(time.perf_counter() - start)
+        allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    times = np.array(times) * 1000
+    return {"mean_ms": times.mean(), "p95_ms": np.percentile(times, 95), "alloc_kb_per_frame": np.mean(allocated) / 1024}
+
+def run(num_frames, width, height):
+    rng = np.random.default_rng(1234)
+    frames = [fabric_image(rng, width, height) for _ in range(min(num_frames, 30))]
+    frames = (frames * (num_frames // len(frames) + 1))[:num_frames]
+    detections = Detections([[width * 0.2, height * 0.2, width * 0.3, height * 0.35],
+                             [width * 0.6, height * 0.5, width * 0.7, height * 0.6]], [0, 1], [0.91, 0.74])
+    root = label = None
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        label = tk.Label(root)
+        label.pack()
+    except Exception as e:
+        print(f"No display ({e}); measuring without the Tk PhotoImage step")
+
+    results = {"before": measure(render_before, frames, detections, label, root),
+               "after": measure(make_render_after(label), frames, detections, label, root)}
+    if root is not None:
+        root.destroy()
+    print(f"{num_frames} frames {width}x{height} -> {DISPLAY_SIZE[0]}x{DISPLAY_SIZE[1]}")
+    for name, result in results.items():
+        print(f"{name:>6}: {result['mean_ms']:.2f} ms mean, {result['p95_ms']:.2f} ms p95, "
+              f"{result['alloc_kb_per_frame']:.1f} KB allocated per frame")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the live display path before and after buffer reuse")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+    run(args.frames, args.width, args.height)
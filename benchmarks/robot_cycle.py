@@ -0,0 +1,59 @@
+# benchmarks/robot_cycle.py (Pick-and-place throughput and detection-to-actuation latency)
+# Usage: python -m benchmarks.robot_cycle [--cycles 10] [--motion-time 0.5] [--link-latency 0.005]
+# Runs headless against benchmarks.virtual_arduino; no arm or camera needed.
+import argparse
+import logging
+import statistics
+import time
+
+# Configure logging before importing robo so its file handler does not append to fabric_robot.log
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+import robo
+from benchmarks.virtual_arduino import VirtualArduino
+
+def wait_for_command(arduino, after, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        for received_at, _ in reversed(arduino.received):
+            if received_at >= after:
+                return received_at
+        time.sleep(0.0005)
+    raise TimeoutError("Virtual Arduino saw no command")
+
+def run(cycles, motion_time, link_latency, pipeline_depth):
+    arduino = VirtualArduino(motion_time, link_latency, initial_angles=[120, 45, 45, 180]).start()
+    robo.Settings.ARDUINO_PORT = arduino.port
+    robo.Settings.ARDUINO_PIPELINE_DEPTH = pipeline_depth
+    arm = robo.RobotArmController()
+    if not arm.arm_ready:
+        raise SystemExit("Robot arm controller failed to connect to the virtual Arduino")
+
+    actuation_latencies = []
+    start = time.perf_counter()
+    for i in range(cycles):
+        # Same call the auto mode makes when a defect passes the threshold
+        detected_at = time.perf_counter()
+        future = arm.handle_object(defective=i % 2 == 0)
+        actuation_latencies.append(wait_for_command(arduino, detected_at) - detected_at)
+        future.result()
+    elapsed = time.perf_counter() - start
+
+    print(f"motion_time={motion_time}s link_latency={link_latency * 1000:.1f}ms pipeline_depth={pipeline_depth}")
+    print(f"cycles/min            {cycles * 60 / elapsed:8.2f}")
+    print(f"cycle time (median)   {statistics.median(arm.cycle_times):8.3f} s")
+    print(f"detect->actuation     {statistics.median(actuation_latencies) * 1000:8.2f} ms median, "
+          f"{max(actuation_latencies) * 1000:.2f} ms max")
+    for name, stats in arm.latency_stats().items():
+        print(f"{name:<10} round trip   {stats['mean_ms']:8.1f} ms mean, {stats['p95_ms']:.1f} ms p95 ({stats['count']} cmds)")
+    arm.close()
+    arduino.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark robot pick-and-place cycles against a virtual Arduino")
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--motion-time", type=float, default=0.5, help="Seconds for a 180 degree servo move")
+    parser.add_argument("--link-latency", type=float, default=0.005, help="One-way serial latency in seconds")
+    parser.add_argument("--pipeline-depth", type=int, default=robo.Settings.ARDUINO_PIPELINE_DEPTH)
+    args = parser.parse_args()
+    run(args.cycles, args.motion_time, args.link_latency, args.pipeline_depth)
@@ -0,0 +1,54 @@
+# benchmarks/startup_time.py (Time-to-first-window for the Tk entry points)
+# Usage: python -m benchmarks.startup_time [--runs 5] [main.py live.py robo.py]
+# Needs a display (use xvfb-run on a headless box).
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child: patch Tk so the first window reports when it is mapped, then exit
+HARNESS = """
+import os, runpy, sys, time, tkinter
+start = float(os.environ["STARTUP_BENCH_T0"])
+_init = tkinter.Tk.__init__
+def _report(*_):
+    print(f"FIRST_WINDOW {time.time() - start:.4f}", flush=True)
+    os._exit(0)
+def _patched(self, *args, **kwargs):
+    _init(self, *args, **kwargs)
+    self.bind("<Map>", _report)
+    self.after(0, _report)
+tkinter.Tk.__init__ = _patched
+sys.argv = [sys.argv[1]]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+def measure(script, timeout):
+    env = dict(os.environ, STARTUP_BENCH_T0=repr(time.time()))
+    proc = subprocess.run([sys.executable, "-c", HARNESS, script], cwd=ROOT, env=env,
+                          capture_output=True, text=True, timeout=timeout)
+    for line in proc.stdout.splitlines():
+        if line.startswith("FIRST_WINDOW "):
+            return float(line.split()[1])
+    raise RuntimeError(f"{script} exited without opening a window:\n{proc.stderr[-2000:]}")
+
+def run(scripts, runs, timeout):
+    for script in scripts:
+        try:
+            samples = [measure(script, timeout) for _ in range(runs)]
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"{script:<10} failed: {e}")
+            continue
+        print(f"{script:<10} median {statistics.median(samples):6.3f} s  min {min(samples):6.3f} s  max {max(samples):6.3f} s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure time from process start to first Tk window")
+    parser.add_argument("scripts", nargs="*", default=["main.py", "live.py", "robo.py"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+    run(args.scripts, args.runs, args.timeout)
@@ -0,0 +1,259 @@
+# benchmarks/suite.py (Reproducible offline benchmarks for the batch and live paths)
+# Usage:
+#   python -m benchmarks.suite run [--out results.json] [--images 32] [--frames 60]
+#   python -m benchmarks.suite compare baseline.json results.json [--tolerance 0.10]
+# Everything is synthetic: fabric-like images and video are generated with a fixed seed and
+# the model is a randomly initialised YOLOv8n built from its yaml, so no weights or
+# camera are needed. Each case runs in its own process so peak RSS is per case.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEED = 1234
+CASES = ("startup", "batch", "live", "robo")
+
+# Metrics where a larger value is better; everything else is a latency/size (smaller is better)
+HIGHER_IS_BETTER = {"batch.images_per_s", "live.fps", "robo.fps"}
+
+def fabric_image(rng, width, height, defects=3):
+    import cv2
+    import numpy as np
+    # Woven texture: crossed sinusoids plus noise, with a few dark holes and bright stitch lines
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    weave = 128 + 40 * np.sin(x * 0.8) * np.sin(y * 0.8) + rng.normal(0, 12, (height, width))
+    image = np.clip(np.stack([weave * 0.9, weave * 0.95, weave], axis=-1), 0, 255).astype(np.uint8)
+    for _ in range(defects):
+        cx, cy = int(rng.integers(20, width - 20)), int(rng.integers(20, height - 20))
+        if rng.random() < 0.5:
+            cv2.circle(image, (cx, cy), int(rng.integers(4, 15)), (20, 20, 20), -1)
+        else:
+            cv2.line(image, (cx, cy), (cx + int(rng.integers(-60, 60)), cy + int(rng.integers(-60, 60))), (230, 230, 230), 2)
+    return image
+
+def prepare(workdir, num_images, num_frames):
+    import cv2
+    import numpy as np
+    from ultralytics import YOLO
+    import torch
+
+    rng = np.random.default_rng(SEED)
+    image_dir = os.path.join(workdir, "images")
+    os.makedirs(image_dir, exist_ok=True)
+    for i in range(num_images):
+        cv2.imwrite(os.path.join(image_dir, f"fabric_{i:04d}.jpg"), fabric_image(rng, 1280, 960))
+
+    video_path = os.path.join(workdir, "fabric.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (640, 480))
+    base = fabric_image(rng, 640 + num_frames * 4, 480)
+    for i in range(num_frames):
+        writer.write(np.ascontiguousarray(base[:, i * 4:i * 4 + 640]))  # Fabric moving under the camera
+    writer.release()
+
+    torch.manual_seed(SEED)
+    model_path = os.path.join(workdir, "tiny.pt")
+    YOLO("yolov8n.yaml").save(model_path)
+    return {"images": image_dir, "video": video_path, "model": model_path}
+
+def _configure_core(paths, workdir):
+    import config.settings as settings
+    settings.MODEL_PATH = paths["model"]
+    settings.DEVICE = "cpu"
+    settings.INFERENCE_BACKEND = "torch"
+    settings.DETECTED_FOLDER = os.path.join(workdir, "detected")
+    settings.CACHE_ENABLED = False  # Measure inference, not cache hits
+    settings.RESULTS_ENABLED = False  # Keep synthetic detections out of ./cache/results.sqlite and the timings
+    settings.TILED_INFERENCE = False
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _percentiles(samples, prefix):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000
+    return {f"{prefix}.p50_ms": pick(0.50), f"{prefix}.p95_ms": pick(0.95), f"{prefix}.p99_ms": pick(0.99)}
+
+def _video_frames(video_path):
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def case_startup(paths, workdir):
+    start = time.perf_counter()
+    _configure_core(paths, workdir)
+    import cv2
+    from core.model import predict_images
+    imported = time.perf_counter()
+    image = cv2.imread(os.path.join(paths["images"], "fabric_0000.jpg"))
+    predict_images([image])
+    return {"startup.import_s": imported - start, "startup.first_inference_s": time.perf_counter() - start,
+            "startup.peak_rss_mb": _peak_rss_mb()}
+
+def case_batch(paths, workdir):
+    _configure_core(paths, workdir)
+    from core.model import process_images, list_images, get_model
+    get_model()
+    num_images = len(list_images(paths["images"]))
+    process_images(paths["images"])  # Warm-up
+    start = time.perf_counter()
+    process_images(paths["images"])
+    elapsed = time.perf_counter() - start
+    return {"batch.images_per_s": num_images / elapsed, "batch.peak_rss_mb": _peak_rss_mb()}
+
+def _configure_app(module, model_path):
+    module.Settings.MODEL_PATH = model_path
+    module.Settings.DEVICE = "cpu"
+    module.Settings.INFERENCE_BACKEND = "torch"
+    module.LiveFabricDefectDetector._shared = None
+
+def _fixed_scheduler(settings):
+    # One input size, so results stay comparable between runs regardless of machine load
+    from core.scheduler import FrameScheduler
+    return FrameScheduler(settings.FRAME_RATE, settings.LATENCY_BUDGET, settings.INPUT_SIZES[:1])
+
+def _run_frames(process_frame, frames):
+    from core.display import DisplayBuffer
+    display = DisplayBuffer((640, 480))
+    latencies = []
+    start = time.perf_counter()
+    for frame in frames:
+        t0 = time.perf_counter()
+        image, _, detections = process_frame(frame.copy())
+        # Display preparation done by update_frame, minus the Tk PhotoImage paste (needs a display)
+        display.render(image, detections)
+        latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start
+
+def case_live(paths, workdir):
+    import logging
+    logging.basicConfig(level=logging.WARNING)
+    import live
+    _configure_app(live, paths["model"])
+    app = live.headless_app(_fixed_scheduler(live.Settings))
+    frames = _video_frames(paths["video"])
+    _run_frames(app.process_frame, frames[:3])  # Warm-up
+    latencies, elapsed = _run_frames(app.process_frame, frames)
+    return {**_percentiles(latencies, "live"), "live.fps": len(frames) / elapsed, "live.peak_rss_mb": _peak_rss_mb()}
+
+def case_robo(paths, workdir):
+    import logging
+    logging.basicConfig(level=logging.WARNING)  # Before importing robo, so fabric_robot.log is untouched
+    import robo
+    from core.gate import ChangeGate
+    _configure_app(robo, paths["model"])
+    app = robo.headless_app(_fixed_scheduler(robo.Settings))
+    frames = _video_frames(paths["video"])
+    _run_frames(app.process_frame, frames[:3])  # Warm-up
+    app.change_gate = ChangeGate(robo.Settings.CHANGE_THRESHOLD, refresh_every=robo.Settings.FORCE_REFRESH_FRAMES)
+    robo.IntegratedFabricDetectionApp.init_tracking(app)
+    latencies, elapsed = _run_frames(app.process_frame, frames)
+    return {**_percentiles(latencies, "robo"), "robo.fps": len(frames) / elapsed,
+            "robo.skip_ratio": app.change_gate.skip_ratio, "robo.peak_rss_mb": _peak_rss_mb()}
+
+def run_case(name, paths_json, workdir):
+    import numpy as np
+    import torch
+    np.random.seed(SEED)
+    torch.manual_seed(SEED)
+    torch.set_num_threads(max(1, os.cpu_count() or 1))
+    result = globals()[f"case_{name}"](json.loads(paths_json), workdir)
+    print("RESULT " + json.dumps(result), flush=True)
+
+def metadata():
+    import torch
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "seed": SEED,
+    }
+
+def run(out_path, num_images, num_frames, cases):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="fabric-bench-") as workdir:
+        print(f"Generating {num_images} images, {num_frames} video frames and a tiny model in {workdir}")
+        paths = prepare(workdir, num_images, num_frames)
+        for name in cases:
+            print(f"Running {name}...", flush=True)
+            proc = subprocess.run([sys.executable, "-m", "benchmarks.suite", "_case", name, json.dumps(paths), workdir],
+                                  cwd=ROOT, capture_output=True, text=True)
+            lines = [line for line in proc.stdout.splitlines() if line.startswith("RESULT ")]
+            if proc.returncode != 0 or not lines:
+                print(f"  {name} failed:\n{proc.stderr[-2000:]}")
+                continue
+            case_results = json.loads(lines[-1][len("RESULT "):])
+            for key, value in case_results.items():
+                print(f"  {key:<28} {value:10.3f}")
+            results.update(case_results)
+
+    report = {"meta": {**metadata(), "images": num_images, "frames": num_frames}, "results": results}
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {out_path}")
+    return report
+
+def compare(baseline_path, current_path, tolerance):
+    """Print every metric's change and return the number that regressed beyond tolerance."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    for key in sorted(baseline):
+        if key not in current:
+            print(f"{key:<28} missing from {current_path}")
+            continue
+        before, after = baseline[key], current[key]
+        change = (after - before) / before if before else 0.0
+        worse = -change if key in HIGHER_IS_BETTER else change
+        flag = "REGRESSION" if worse > tolerance else ("improved" if worse < -tolerance else "")
+        regressions += flag == "REGRESSION"
+        print(f"{key:<28} {before:10.3f} -> {after:10.3f}  {change:+7.1%}  {flag}")
+    print(f"{regressions} regression(s) beyond {tolerance:.0%}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the batch and live paths")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="Run the benchmarks and write JSON results")
+    run_parser.add_argument("--out", default="bench_results.json")
+    run_parser.add_argument("--images", type=int, default=32)
+    run_parser.add_argument("--frames", type=int, default=60)
+    run_parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    compare_parser = sub.add_parser("compare", help="Flag regressions against a stored baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown")
+    case_parser = sub.add_parser("_case")  # Internal: one case in a fresh process
+    case_parser.add_argument("name", choices=CASES)
+    case_parser.add_argument("paths")
+    case_parser.add_argument("workdir")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        run(args.out, args.images, args.frames, args.cases)
+        return 0
+    if args.command == "compare":
+        return 1 if compare(args.baseline, args.current, args.tolerance) else 0
+    run_case(args.name, args.paths, args.workdir)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
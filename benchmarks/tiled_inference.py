@@ -0,0 +1,72 @@
+# benchmarks/tiled_inference.py (Whole-image vs tiled inference: throughput and small-defect recall)
+# Usage: python -m benchmarks.tiled_inference [--folder DIR] [--labels DIR] [--small-area 0.001]
+# Labels are YOLO txt files (class cx cy w h, normalised) named after each image, as in the
+# training dataset layout (data/test/images + data/test/labels).
+import argparse
+import os
+import time
+import cv2
+import numpy as np
+from config.settings import IMAGE_FOLDER, TILE_SIZE, TILE_OVERLAP, TILE_MERGE_IOU
+from core.model import list_images, predict_images, predict_tiled
+from core.tiling import box_iou
+
+def load_labels(label_path, width, height):
+    if not os.path.exists(label_path):
+        return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=int)
+    rows = np.loadtxt(label_path, ndmin=2)
+    if rows.size == 0:
+        return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=int)
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1).astype(np.float32)
+    return boxes, rows[:, 0].astype(int)
+
+def count_matches(gt_boxes, gt_classes, boxes, class_ids, iou_threshold=0.5):
+    matched = 0
+    for gt_box, gt_class in zip(gt_boxes, gt_classes):
+        same = boxes[class_ids == gt_class]
+        if len(same) and box_iou(gt_box, same).max() >= iou_threshold:
+            matched += 1
+    return matched
+
+def run(folder_path, labels_path, small_area, tile_size, overlap, merge_iou):
+    img_paths = list_images(folder_path)
+    images = [cv2.imread(path) for path in img_paths]
+    print(f"{len(images)} images, tile {tile_size}px, overlap {overlap:.0%}, merge IoU {merge_iou}")
+
+    # Warm-up so model loading is not charged to the first mode
+    predict_images(images[:1])
+
+    modes = {
+        "whole": lambda batch: predict_images(batch),
+        "tiled": lambda batch: predict_tiled(batch, tile_size, overlap, merge_iou),
+    }
+    for name, predict in modes.items():
+        start = time.perf_counter()
+        outputs = [predict([image])[0] for image in images]
+        elapsed = time.perf_counter() - start
+
+        small_total = small_found = 0
+        for img_path, image, (boxes, class_ids, _) in zip(img_paths, images, outputs):
+            height, width = image.shape[:2]
+            stem = os.path.splitext(os.path.basename(img_path))[0]
+            gt_boxes, gt_classes = load_labels(os.path.join(labels_path, f"{stem}.txt"), width, height)
+            areas = (gt_boxes[:, 2] - gt_boxes[:, 0]) * (gt_boxes[:, 3] - gt_boxes[:, 1])
+            small = areas < small_area * width * height
+            small_total += int(small.sum())
+            small_found += count_matches(gt_boxes[small], gt_classes[small], boxes, class_ids)
+
+        recall = small_found / small_total if small_total else float("nan")
+        print(f"{name:<6} {len(images) / elapsed:7.2f} img/s  small-defect recall {recall:.3f} ({small_found}/{small_total})")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare whole-image and tiled inference")
+    parser.add_argument("--folder", default=IMAGE_FOLDER)
+    parser.add_argument("--labels", default=None, help="YOLO label folder (default: ../labels next to --folder)")
+    parser.add_argument("--small-area", type=float, default=0.001, help="Max box area, as a fraction of the image, counted as small")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    parser.add_argument("--overlap", type=float, default=TILE_OVERLAP)
+    parser.add_argument("--merge-iou", type=float, default=TILE_MERGE_IOU)
+    args = parser.parse_args()
+    labels = args.labels or os.path.join(os.path.dirname(os.path.normpath(args.folder)), "labels")
+    run(args.folder, labels, args.small_area, args.tile_size, args.overlap, args.merge_iou)
@@ -0,0 +1,101 @@
+# benchmarks/virtual_arduino.py (pty-backed fake of the robot arm firmware)
+# Usage: python -m benchmarks.virtual_arduino [--motion-time 0.5] [--link-latency 0.005]
+# Prints a device path to use as ARDUINO_PORT in robo.py (Linux/macOS only).
+import argparse
+import json
+import os
+import threading
+import time
+import tty
+
+class VirtualArduino:
+    """Speaks the robo.py JSON protocol on a pseudo-terminal.
+
+    Commands are executed one at a time in arrival order, like the firmware loop:
+    {"cmd": "move", "servo": n, "angle": a} and {"cmd": "move_all", "angles": [...]}.
+    A move takes motion_time seconds for a 180 degree swing of the largest-moving servo
+    (scaled linearly), then one acknowledgement line is written back. link_latency is
+    added in each direction.
+    """
+
+    def __init__(self, motion_time=0.5, link_latency=0.005, servos=4, initial_angles=None):
+        self.motion_time = motion_time
+        self.link_latency = link_latency
+        self.angles = list(initial_angles or [90] * servos)
+        self.received = []  # (perf_counter timestamp, command dict) for every command seen
+        self.completed = 0
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="virtual-arduino", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        buffer = b""
+        while not self._stop.is_set():
+            try:
+                chunk = os.read(self.master, 4096)
+            except OSError:
+                break
+            if not chunk:
+                break
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                if line.strip():
+                    self._handle(line.decode(errors="replace"))
+
+    def _handle(self, line):
+        arrived = time.perf_counter()
+        time.sleep(self.link_latency)
+        try:
+            command = json.loads(line)
+        except ValueError:
+            self._reply({"status": "error", "error": "bad json"})
+            return
+        self.received.append((arrived, command))
+
+        if command.get("cmd") == "move":
+            targets = {command["servo"]: command["angle"]}
+        elif command.get("cmd") == "move_all":
+            targets = dict(enumerate(command["angles"]))
+        else:
+            self._reply({"status": "error", "error": f"unknown cmd {command.get('cmd')!r}"})
+            return
+
+        swing = max((abs(angle - self.angles[servo]) for servo, angle in targets.items()), default=0)
+        time.sleep(self.motion_time * swing / 180.0)
+        for servo, angle in targets.items():
+            self.angles[servo] = angle
+        self.completed += 1
+        time.sleep(self.link_latency)
+        self._reply({"status": "ok", "cmd": command["cmd"]})
+
+    def _reply(self, payload):
+        os.write(self.master, (json.dumps(payload) + "\n").encode())
+
+    def close(self):
+        self._stop.set()
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a virtual robot-arm Arduino on a pty")
+    parser.add_argument("--motion-time", type=float, default=0.5, help="Seconds for a 180 degree servo move")
+    parser.add_argument("--link-latency", type=float, default=0.005, help="One-way serial latency in seconds")
+    args = parser.parse_args()
+    arduino = VirtualArduino(args.motion_time, args.link_latency).start()
+    print(f"Virtual Arduino listening on {arduino.port} (Ctrl+C to stop)", flush=True)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        arduino.close()
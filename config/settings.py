@@ -1,41 +1,32 @@
 # config/settings.py (Configuration settings)
-import torch
-
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+DEVICE = None  # None = "cuda" when available, else "cpu"; resolved when the model is first loaded
 MODEL_PATH = "C:/Users/spgir/OneDrive/Documents/BE Project/codebase/model_training/models/runs/train/weights/best.pt"
+INFERENCE_BACKEND = "torch"  # "torch", "onnx" or "onnx-int8" (ONNX files made by `python -m core.export`)
 IMAGE_FOLDER = "C:/Users/spgir/OneDrive/Documents/BE Project/codebase/model_training/data/test/images"
+CONF_THRESHOLD = 0.25  # Minimum detection confidence passed to model.predict
 CLASS_NAMES = ['Hole', 'Stitch', 'seam']
 CLASS_MAPPING = {i: name for i, name in enumerate(CLASS_NAMES)}
 DETECTED_FOLDER = "./detected_objects"
-
-# core/model.py (Model loading and processing)
-from ultralytics import YOLO
-import cv2
-import os
-import random
-from config.settings import DEVICE, MODEL_PATH, CLASS_MAPPING, DETECTED_FOLDER
-
-os.makedirs(DETECTED_FOLDER, exist_ok=True)
-
-model = YOLO(MODEL_PATH).to(DEVICE)
-device = "cuda" if torch.cuda.is_available() else "cpu"
-print(f"Using device: {device}")
-print("Model loaded successfully on GPU!")
-
-def process_images(folder_path):
-    detected_files = []
-    
-    for filename in os.listdir(folder_path):
-        if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-            img_path = os.path.join(folder_path, filename)
-            image = cv2.imread(img_path)
-            results = model.predict(source=image, save=False, show=False, device=DEVICE)
-            class_ids = results[0].boxes.cls.cpu().numpy().astype(int) if results[0].boxes else []
-
-            valid_classes = [CLASS_MAPPING[class_id] for class_id in class_ids if class_id in CLASS_MAPPING]
-            for obj_class in valid_classes:
-                img_save_path = f"{DETECTED_FOLDER}/{obj_class}_{random.randint(0,9999)}.jpg"
-                cv2.imwrite(img_save_path, image)
-                detected_files.append((obj_class, img_save_path))
-    
-    return detected_files
\ No newline at end of file
+BATCH_SIZE = 16  # Images per model.predict call in process_images (1 = one at a time)
+DECODE_WORKERS = 4  # Threads running cv2.imread ahead of inference
+WRITE_WORKERS = 2  # Threads saving detected images
+PREFETCH_SIZE = 32  # Max decoded images (and pending writes) held in memory
+CACHE_ENABLED = True  # Reuse stored detections for unchanged images and weights
+CACHE_PATH = "./cache/detections.sqlite"
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+RESULTS_ENABLED = True  # Append every detection to the indexed results store
+RESULTS_PATH = "./cache/results.sqlite"
+SAVE_CROPS = False  # Also write one small crop per detected box to DETECTED_FOLDER/crops
+CROP_PADDING = 8  # Pixels of context around each crop
+JPEG_QUALITY = 90
+TILED_INFERENCE = False  # Run high-resolution scans as overlapping tiles instead of one downscaled image
+TILE_SIZE = 640  # Tile edge in pixels (matches the model input size)
+TILE_OVERLAP = 0.2  # Fraction of TILE_SIZE shared by neighbouring tiles
+TILE_MERGE_IOU = 0.5  # IoU above which same-class boxes from different tiles are merged
+THUMBNAIL_FOLDER = "./cache/thumbnails"  # Packed gallery thumbnails (atlas.bin + index.sqlite)
+THUMBNAIL_SIZE = (250, 250)
+INGEST_CHECKPOINT = "./cache/ingest.sqlite"  # Files already processed by `python -m core.ingest`
+INGEST_SETTLE_SECONDS = 2.0  # A new file must keep the same size and mtime this long before it is read
+INGEST_POLL_INTERVAL = 1.0  # Seconds between scans when inotify is not available
+INGEST_QUEUE_SIZE = 256  # Ready files waiting for the detector; the watcher blocks beyond this
+INGEST_MAX_ATTEMPTS = 3  # Failed tries before a file is checkpointed as skipped
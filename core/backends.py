@@ -0,0 +1,35 @@
+# core/backends.py (Inference backends: eager PyTorch, ONNX Runtime CPU, int8 ONNX)
+import os
+
+# Every backend is driven through ultralytics' YOLO wrapper, which picks PyTorch or an
+# ONNX Runtime session from the weights file, so pre/post-processing is identical.
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+def backend_model_path(model_path, backend):
+    """Weights file a backend loads: best.pt, best.onnx or best.int8.onnx next to each other."""
+    stem = os.path.splitext(model_path)[0]
+    if backend == "torch":
+        return model_path
+    if backend == "onnx":
+        return f"{stem}.onnx"
+    if backend == "onnx-int8":
+        return f"{stem}.int8.onnx"
+    raise ValueError(f"Unknown inference backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+def backend_weights(model_path, backend):
+    """backend_model_path, raising a FileNotFoundError that says how to create missing ONNX files."""
+    weights = backend_model_path(model_path, backend)
+    if backend != "torch" and not os.path.exists(weights):
+        raise FileNotFoundError(f"{weights} not found; run `python -m core.export` to create it")
+    return weights
+
+def load_backend(model_path, backend, device):
+    """Return (model, device) ready for model.predict(..., device=device)."""
+    from ultralytics import YOLO
+    weights = backend_weights(model_path, backend)
+    if backend == "torch":
+        model = YOLO(weights)
+        model.to(device)
+        return model, device
+    # ONNX Runtime sessions here are CPU-only
+    return YOLO(weights, task="detect"), "cpu"
@@ -0,0 +1,78 @@
+# core/batch.py (Headless multi-process folder processing)
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def shard(items, num_shards):
+    # Interleave so every shard gets a similar mix of file sizes
+    return [items[i::num_shards] for i in range(num_shards) if items[i::num_shards]]
+
+def _init_worker(overrides, threads):
+    # Runs first in each spawned process: cap the math libraries' thread pools before torch is
+    # imported, and apply CLI overrides before core.model reads config.settings
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    import config.settings as settings
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    import cv2
+    cv2.setNumThreads(1)
+
+def _process_shard(img_paths, run_id):
+    from core.model import get_model, iter_file_detections
+    from config.settings import BATCH_SIZE
+    get_model()  # Each worker holds its own model
+    start = time.perf_counter()
+    detections = list(iter_file_detections(img_paths, BATCH_SIZE, ramp_up=False, run_id=run_id))
+    return len(img_paths), detections, time.perf_counter() - start
+
+def run_batch(img_paths, overrides, workers, threads, summary_path=None, run_id=None):
+    """Process img_paths across `workers` processes with `threads` torch threads each.
+
+    All workers log to the same results-store run. Returns the summary dict, also written
+    as JSON to summary_path when given.
+    """
+    start = time.perf_counter()
+    shards = shard(sorted(img_paths), max(1, workers))
+    # Per-process decode/write pools stay small; the process pool provides the parallelism
+    overrides = {"DECODE_WORKERS": 1, "WRITE_WORKERS": 1, **overrides}
+    files = {}
+    processed = 0
+    context = multiprocessing.get_context("spawn")  # Fresh interpreters: no forked torch state
+    with ProcessPoolExecutor(max_workers=len(shards) or 1, mp_context=context,
+                             initializer=_init_worker, initargs=(overrides, threads)) as pool:
+        futures = [pool.submit(_process_shard, paths, run_id) for paths in shards]
+        for future in as_completed(futures):
+            count, detections, _ = future.result()
+            processed += count
+            for img_path, obj_class, confidence, img_save_path in detections:
+                files.setdefault(img_path, []).append(
+                    {"class": obj_class, "confidence": round(confidence, 4), "output": img_save_path})
+    elapsed = time.perf_counter() - start
+
+    per_class = {}
+    for detections in files.values():
+        for detection in detections:
+            per_class[detection["class"]] = per_class.get(detection["class"], 0) + 1
+    summary = {
+        "images": processed,
+        "images_with_defects": len(files),
+        "detections": sum(per_class.values()),
+        "per_class": per_class,
+        "elapsed_s": round(elapsed, 3),
+        "images_per_s": round(processed / elapsed, 2) if elapsed else 0.0,
+        "run_id": run_id,
+        "workers": len(shards),
+        "threads_per_worker": threads,
+        "settings": {key: value for key, value in overrides.items() if isinstance(value, (str, int, float, bool))},
+        "files": {path: files[path] for path in sorted(files)},
+    }
+    if summary_path:
+        with open(summary_path, "w") as f:
+            json.dump(summary, f, indent=2)
+    return summary
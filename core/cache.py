@@ -0,0 +1,112 @@
+# core/cache.py (Persistent content-addressed detection cache)
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def bytes_digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+class DetectionCache:
+    """SQLite store of model outputs keyed by image hash + weights hash + inference params.
+
+    Entries hold boxes (xyxy), class ids and confidences. Opening the cache with
+    different weights drops every entry; when the stored payload exceeds max_bytes
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, db_path, model_digest, params, max_bytes):
+        self.model_digest = model_digest
+        self.params = json.dumps(params, sort_keys=True, default=str)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)  # Batch workers in other processes may hold the write lock
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS detections ("
+            " key TEXT PRIMARY KEY, payload TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_detections_last_used ON detections (last_used)")
+        self._invalidate_if_model_changed()
+        # Keys held in memory so decode threads can ask has() without touching the connection
+        self.keys = {row[0] for row in self.conn.execute("SELECT key FROM detections")}
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM detections").fetchone()[0]
+        self.conn.commit()
+
+    def _invalidate_if_model_changed(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'model_digest'").fetchone()
+        if row is None or row[0] != self.model_digest:
+            if row is not None:
+                print("Model weights changed, clearing detection cache")
+            self.conn.execute("DELETE FROM detections")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model_digest', ?)", (self.model_digest,))
+
+    def _key(self, image_digest):
+        return bytes_digest(f"{image_digest}|{self.model_digest}|{self.params}".encode())
+
+    def has(self, image_digest):
+        """Whether an entry exists; safe to call from any thread."""
+        return self._key(image_digest) in self.keys
+
+    def get(self, image_digest):
+        """Return {"boxes", "classes", "confidences"} for a cached image, or None."""
+        key = self._key(image_digest)
+        row = self.conn.execute("SELECT payload FROM detections WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.conn.execute("UPDATE detections SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, image_digest, boxes, classes, confidences):
+        key = self._key(image_digest)
+        payload = json.dumps({"boxes": boxes, "classes": classes, "confidences": confidences})
+        old = self.conn.execute("SELECT size FROM detections WHERE key = ?", (key,)).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO detections (key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, payload, len(payload), time.time()),
+        )
+        self.keys.add(key)
+        self.total_bytes += len(payload) - (old[0] if old else 0)
+        if self.total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # Drop least recently used entries until the payload fits in 90% of the budget
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT key, size FROM detections ORDER BY last_used").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            evicted.append((key,))
+            self.keys.discard(key)
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM detections WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "bytes": self.total_bytes}
+
+    def flush(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
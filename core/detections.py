@@ -0,0 +1,73 @@
+# core/detections.py (Array-backed detection results)
+import cv2
+import numpy as np
+
+BOX_COLOR = (0, 255, 0)
+
+class Detections:
+    """Boxes (N x 4 xyxy float32), class ids (N int) and confidences (N float32) for one image.
+
+    Built from a single NumPy copy of the model's output tensor, so filtering and label
+    lookup are array operations instead of per-box tensor-to-Python conversions. Iterating
+    yields (boxes, class_ids, confidences), so it unpacks like the plain tuple it replaces.
+    """
+
+    __slots__ = ("boxes", "class_ids", "confidences")
+
+    def __init__(self, boxes, class_ids, confidences):
+        self.boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        self.class_ids = np.asarray(class_ids, dtype=int).reshape(-1)
+        self.confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0))
+
+    @classmethod
+    def from_result(cls, result):
+        # boxes.data rows are [x1, y1, x2, y2, (track_id,) conf, cls]; one device->host copy
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty()
+        data = boxes.data.cpu().numpy()
+        return cls(data[:, :4], data[:, -1], data[:, -2])
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def __iter__(self):
+        return iter((self.boxes, self.class_ids, self.confidences))
+
+    def __getitem__(self, index):
+        return Detections(self.boxes[index], self.class_ids[index], self.confidences[index])
+
+    def filter(self, min_conf=None, classes=None):
+        """Keep boxes with confidence >= min_conf and class id in `classes` (either may be None)."""
+        keep = np.ones(len(self), dtype=bool)
+        if min_conf is not None:
+            keep &= self.confidences >= min_conf
+        if classes is not None:
+            keep &= np.isin(self.class_ids, list(classes))
+        return self if keep.all() else self[keep]
+
+    def labels(self, class_names):
+        """Class names for every box; ids outside class_names become their string id."""
+        names = np.asarray(list(class_names) + [None], dtype=object)
+        ids = np.where((self.class_ids >= 0) & (self.class_ids < len(names) - 1), self.class_ids, len(names) - 1)
+        found = names[ids]
+        return [name if name is not None else str(class_id) for name, class_id in zip(found, self.class_ids.tolist())]
+
+    def scaled(self, sx, sy):
+        return Detections(self.boxes * np.array([sx, sy, sx, sy], dtype=np.float32), self.class_ids, self.confidences)
+
+    def to_lists(self):
+        return self.boxes.tolist(), self.class_ids.tolist(), self.confidences.tolist()
+
+    def draw(self, image, class_names, label_format="{name} {conf:.2f}", color=BOX_COLOR):
+        """Draw boxes and labels onto image in place and return it."""
+        for (x1, y1, x2, y2), name, conf in zip(self.boxes.astype(int).tolist(), self.labels(class_names),
+                                                self.confidences.tolist()):
+            cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(image, label_format.format(name=name, conf=conf), (x1, max(y1 - 10, 10)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        return image
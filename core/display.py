@@ -0,0 +1,51 @@
+# core/display.py (Reused buffers for showing live frames in Tk)
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+def _block_image(mode, size):
+    # An image in PIL's contiguous block layout, which ImageTk.PhotoImage.paste can blit
+    # directly; other images are converted into a fresh block on every paste
+    try:
+        return Image.Image()._new(Image.core.new_block(mode, size))
+    except AttributeError:  # Older Pillow without new_block
+        return Image.new(mode, size)
+
+class DisplayBuffer:
+    """Resizes, annotates and converts frames into buffers allocated once at display size.
+
+    Overlays are drawn after the resize, so boxes and text cost display-size pixels and
+    stay readable whatever the camera resolution.
+    """
+
+    def __init__(self, size=(640, 480)):
+        self.size = size
+        width, height = size
+        self.bgr = np.empty((height, width, 3), dtype=np.uint8)
+        self.rgba = np.empty((height, width, 4), dtype=np.uint8)
+        self.image = _block_image("RGBA", size)
+
+    def render(self, frame, detections=None, class_names=(), label_format="{name} {conf:.2f}"):
+        """Return self.image holding frame at display size with detections drawn on it."""
+        cv2.resize(frame, self.size, dst=self.bgr, interpolation=cv2.INTER_LINEAR)
+        if detections is not None and len(detections):
+            sx, sy = self.size[0] / frame.shape[1], self.size[1] / frame.shape[0]
+            detections.scaled(sx, sy).draw(self.bgr, class_names, label_format)
+        cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGBA, dst=self.rgba)
+        self.image.frombytes(self.rgba)
+        return self.image
+
+class TkDisplay(DisplayBuffer):
+    """DisplayBuffer shown through one PhotoImage on a Tk label, updated in place every frame."""
+
+    def __init__(self, label, size=(640, 480)):
+        super().__init__(size)
+        self.label = label
+        self.photo = None
+
+    def show(self, frame, detections=None, class_names=(), label_format="{name} {conf:.2f}"):
+        image = self.render(frame, detections, class_names, label_format)
+        if self.photo is None:
+            self.photo = ImageTk.PhotoImage("RGBA", self.size)
+            self.label.config(image=self.photo)
+        self.photo.paste(image)
@@ -0,0 +1,95 @@
+# core/export.py (Export ONNX / int8 ONNX weights and check detection parity)
+# Usage: python -m core.export [--model-path best.pt] [--no-int8] [--parity-folder DIR]
+import argparse
+import os
+import shutil
+import sys
+import cv2
+import numpy as np
+from config.settings import MODEL_PATH, IMAGE_FOLDER
+from core.backends import backend_model_path, load_backend
+from core.tiling import box_iou
+from core.detections import Detections
+
+def export_onnx(model_path, imgsz):
+    from ultralytics import YOLO
+    # Dynamic axes so process_images can send whole batches through one session run
+    exported = YOLO(model_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    target = backend_model_path(model_path, "onnx")
+    if os.path.abspath(exported) != os.path.abspath(target):
+        shutil.move(exported, target)
+    return target
+
+def quantize_int8(onnx_path, int8_path):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+    return int8_path
+
+def _predict(model, device, image):
+    return Detections.from_result(model.predict(source=image, save=False, show=False, device=device)[0])
+
+def compare(reference, candidate, iou_threshold, conf_tolerance):
+    """Count reference boxes matched by a same-class candidate box within IoU and confidence tolerance."""
+    ref_boxes, ref_classes, ref_conf = reference
+    boxes, classes, conf = candidate
+    used = np.zeros(len(boxes), dtype=bool)
+    matched = 0
+    for box, cls, score in zip(ref_boxes, ref_classes, ref_conf):
+        candidates = np.flatnonzero((classes == cls) & ~used)
+        if not len(candidates):
+            continue
+        ious = box_iou(box, boxes[candidates])
+        best = candidates[int(np.argmax(ious))]
+        if ious.max() >= iou_threshold and abs(conf[best] - score) <= conf_tolerance:
+            used[best] = True
+            matched += 1
+    return matched, len(ref_boxes), int((~used).sum())
+
+def parity_check(model_path, backends, img_paths, iou_threshold, conf_tolerance):
+    reference_model, reference_device = load_backend(model_path, "torch", "cpu")
+    images = [image for image in (cv2.imread(path) for path in img_paths) if image is not None]
+    references = [_predict(reference_model, reference_device, image) for image in images]
+
+    ok = True
+    for backend in backends:
+        model, device = load_backend(model_path, backend, "cpu")
+        matched = total = extra = 0
+        for image, reference in zip(images, references):
+            m, t, e = compare(reference, _predict(model, device, image), iou_threshold, conf_tolerance)
+            matched, total, extra = matched + m, total + t, extra + e
+        passed = matched == total and extra == 0
+        ok = ok and passed
+        print(f"{backend:<10} {'PASS' if passed else 'FAIL'}  matched {matched}/{total} reference boxes, {extra} extra "
+              f"(IoU >= {iou_threshold}, |conf diff| <= {conf_tolerance})")
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export ONNX backends for the detector and check they match PyTorch")
+    parser.add_argument("--model-path", default=MODEL_PATH)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--no-int8", action="store_true", help="Skip the dynamically quantized int8 model")
+    parser.add_argument("--parity-folder", default=IMAGE_FOLDER)
+    parser.add_argument("--parity-images", type=int, default=20)
+    parser.add_argument("--iou", type=float, default=0.9)
+    parser.add_argument("--conf-tolerance", type=float, default=0.05)
+    parser.add_argument("--int8-conf-tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    onnx_path = export_onnx(args.model_path, args.imgsz)
+    print(f"Exported {onnx_path}")
+    if not args.no_int8:
+        print(f"Quantized {quantize_int8(onnx_path, backend_model_path(args.model_path, 'onnx-int8'))}")
+
+    if not os.path.isdir(args.parity_folder):
+        print(f"Skipping parity check: {args.parity_folder} not found")
+        return 0
+    from core.model import list_images
+    img_paths = sorted(list_images(args.parity_folder))[:args.parity_images]
+    ok = parity_check(args.model_path, ["onnx"], img_paths, args.iou, args.conf_tolerance)
+    if not args.no_int8:
+        # Quantization moves scores more than a plain export, so it gets its own tolerance
+        ok = parity_check(args.model_path, ["onnx-int8"], img_paths, args.iou, args.int8_conf_tolerance) and ok
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
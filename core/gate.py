@@ -0,0 +1,49 @@
+# core/gate.py (Change detection in front of inference)
+import cv2
+
+class ChangeGate:
+    """Decide whether a frame differs enough from the last inferred one to be worth inferring.
+
+    Frames are compared as small grayscale thumbnails by mean absolute difference
+    (0-255 scale). Every `refresh_every` frames inference is forced regardless.
+    """
+
+    def __init__(self, threshold, size=(64, 48), refresh_every=30):
+        self.threshold = threshold
+        self.size = size
+        self.refresh_every = refresh_every
+        self.reference = None
+        self.since_refresh = 0
+        self.inferred = 0
+        self.skipped = 0
+
+    def _signature(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    def should_infer(self, frame):
+        signature = self._signature(frame)
+        changed = (
+            self.reference is None
+            or self.since_refresh >= self.refresh_every
+            or float(cv2.absdiff(signature, self.reference).mean()) > self.threshold
+        )
+        if changed:
+            self.reference = signature
+            self.since_refresh = 0
+            self.inferred += 1
+        else:
+            self.since_refresh += 1
+            self.skipped += 1
+        return changed
+
+    def reset(self, frame):
+        """Record frame as inferred when the caller runs inference regardless of the gate."""
+        self.reference = self._signature(frame)
+        self.since_refresh = 0
+        self.inferred += 1
+
+    @property
+    def skip_ratio(self):
+        total = self.inferred + self.skipped
+        return self.skipped / total if total else 0.0
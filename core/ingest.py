@@ -0,0 +1,323 @@
+# core/ingest.py (Long-running watch-folder ingestion)
+# Usage: python -m core.ingest [--folder DIR] [--poll]
+#   Processes every image that appears in IMAGE_FOLDER once it has finished being written
+import argparse
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from config.settings import (IMAGE_FOLDER, BATCH_SIZE, INGEST_CHECKPOINT, INGEST_SETTLE_SECONDS,
+                             INGEST_POLL_INTERVAL, INGEST_QUEUE_SIZE, INGEST_MAX_ATTEMPTS)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+class Checkpoint:
+    """SQLite record of files already ingested, keyed by path + size + mtime.
+
+    A file rewritten in place gets a new size/mtime and is processed again.
+    """
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingested ("
+            " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, done_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    def load(self):
+        with self.lock:
+            return {path: (size, mtime_ns) for path, size, mtime_ns in
+                    self.conn.execute("SELECT path, size, mtime_ns FROM ingested")}
+
+    def mark(self, entries):
+        # entries: [(path, size, mtime_ns)], committed together once their batch is done
+        now = time.time()
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO ingested (path, size, mtime_ns, done_at) VALUES (?, ?, ?, ?)",
+                                  [(path, size, mtime_ns, now) for path, size, mtime_ns in entries])
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class Inotify:
+    """Minimal inotify binding through libc; raises OSError where it is not available."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_Q_OVERFLOW = 0x00004000
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, folder):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is Linux only")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), self.IN_CLOSE_WRITE | self.IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {folder}")
+
+    def read(self, timeout):
+        """Return (names, overflowed) for events within timeout seconds."""
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return [], False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+        names, overflowed, offset = [], False, 0
+        while offset < len(data):
+            _, mask, _, length = self.EVENT.unpack_from(data, offset)
+            offset += self.EVENT.size
+            if mask & self.IN_Q_OVERFLOW:
+                overflowed = True
+            elif length:
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names, overflowed
+
+    def close(self):
+        os.close(self.fd)
+
+class FolderWatcher:
+    """Finds new or rewritten images in a folder and hands them on once they stop changing.
+
+    Candidates come from inotify (close-write / moved-in events) when available, otherwise
+    from os.scandir polling; either way a file is only released after its size and mtime
+    have been stable for `settle` seconds, so partially copied files are not read. A full
+    scan on start (and after an inotify overflow) picks up files added while stopped.
+    """
+
+    def __init__(self, folder, ready, checkpoint, settle=INGEST_SETTLE_SECONDS,
+                 poll_interval=INGEST_POLL_INTERVAL, use_inotify=True):
+        self.folder = folder
+        self.ready = ready  # Bounded queue of (path, size, mtime_ns)
+        self.done = checkpoint.load()
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.candidates = {}  # path -> (size, mtime_ns, first seen with this stat)
+        self.queued = set()
+        self.attempts = {}  # path -> failed processing attempts
+        self.requeue = queue.SimpleQueue()  # Paths handed back by the processing thread
+        self.stop_event = threading.Event()
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = Inotify(folder)
+            except OSError as e:
+                print(f"inotify unavailable ({e}), polling every {poll_interval}s")
+        self.thread = threading.Thread(target=self._run, name="ingest-watch", daemon=True)
+
+    @property
+    def mode(self):
+        return "inotify" if self.inotify else "poll"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _scan(self):
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(IMAGE_EXTENSIONS) and entry.is_file():
+                    self._consider(entry.path, entry.stat())
+
+    def _consider(self, path, stat=None):
+        if path in self.queued:
+            return
+        try:
+            stat = stat or os.stat(path)
+        except FileNotFoundError:
+            self.candidates.pop(path, None)
+            return
+        key = (stat.st_size, stat.st_mtime_ns)
+        if self.done.get(path) == key:
+            return
+        previous = self.candidates.get(path)
+        if previous is None or previous[:2] != key:
+            self.candidates[path] = (*key, time.monotonic())
+
+    def _release_settled(self):
+        now = time.monotonic()
+        for path, (size, mtime_ns, since) in list(self.candidates.items()):
+            if now - since < self.settle:
+                continue
+            self._consider(path)  # Re-stat: still the same size and mtime?
+            current = self.candidates.get(path)
+            if current is None or current[2] != since:
+                continue
+            del self.candidates[path]
+            self.queued.add(path)
+            while not self.stop_event.is_set():
+                try:
+                    self.ready.put((path, size, mtime_ns), timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def mark_done(self, entries):
+        # Called from the processing thread after a batch is checkpointed
+        for path, size, mtime_ns in entries:
+            self.done[path] = (size, mtime_ns)
+            self.attempts.pop(path, None)
+            self.requeue.put(path)
+
+    def retry(self, entries, max_attempts=INGEST_MAX_ATTEMPTS):
+        """Hand failed files back to be picked up again after settling.
+
+        Returns the entries that have now failed max_attempts times; the caller checkpoints
+        those as skipped instead.
+        """
+        given_up = []
+        for entry in entries:
+            path = entry[0]
+            self.attempts[path] = self.attempts.get(path, 0) + 1
+            if self.attempts[path] >= max_attempts:
+                given_up.append(entry)
+            else:
+                self.requeue.put(path)
+        return given_up
+
+    def forget(self, entries):
+        # Files gone before processing: dropped unless they reappear
+        for path, _, _ in entries:
+            self.requeue.put(path)
+
+    def _drain_requeue(self):
+        while True:
+            try:
+                path = self.requeue.get_nowait()
+            except queue.Empty:
+                return
+            self.queued.discard(path)
+            if path not in self.done or self.attempts.get(path):
+                self._consider(path)  # Missing files drop out; changed or failed ones settle again
+
+    def _run(self):
+        self._scan()
+        while not self.stop_event.is_set():
+            self._drain_requeue()
+            timeout = min(self.poll_interval, self.settle / 2 or self.poll_interval)
+            if self.inotify:
+                names, overflowed = self.inotify.read(timeout if self.candidates else self.poll_interval)
+                if overflowed:
+                    self._scan()
+                for name in names:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        self._consider(os.path.join(self.folder, name))
+                # Re-stat pending files so writers that keep the file open still settle
+                for path in list(self.candidates):
+                    self._consider(path)
+            else:
+                self.stop_event.wait(self.poll_interval)
+                self._scan()
+            self._release_settled()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join(timeout=2.0)
+        if self.inotify:
+            self.inotify.close()
+
+def drain(ready, batch_size, timeout):
+    # Block for the first ready file, then take whatever else is already waiting
+    batch = [ready.get(timeout=timeout)]
+    while len(batch) < batch_size:
+        try:
+            batch.append(ready.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+def process(entries, batch_size, cache, results, run_id, finished):
+    # Raises on model or IO errors; undecodable images are skipped and count as processed.
+    # Paths whose outputs and results were written are added to `finished` as they complete.
+    from core.model import detect_files
+    for img_path, obj_class, confidence, img_save_path in detect_files(
+            [path for path, _, _ in entries], cache, results, run_id, batch_size, ramp_up=False):
+        finished.add(img_path)
+        print(f"{os.path.basename(img_path)}: {obj_class} {confidence:.2f} -> {img_save_path}")
+
+def run(folder=IMAGE_FOLDER, batch_size=BATCH_SIZE, use_inotify=True, stop=None):
+    """Watch folder until stop is set (or Ctrl+C), detecting defects in every new image.
+
+    Files are checkpointed only once they have been processed (or skipped as undecodable),
+    so a restart resumes with whatever was not finished. When a batch fails, the files it
+    had not finished are retried one by one; a file that keeps failing is checkpointed as
+    skipped after INGEST_MAX_ATTEMPTS tries. The cache and results store stay open for the
+    whole run.
+    """
+    from core.model import get_model, start_results_run, open_cache, open_results, close_stores
+    get_model()  # Fail before anything is checkpointed if the weights cannot be loaded
+    cache, results = open_cache(), open_results()
+    stop = stop or threading.Event()
+    checkpoint = Checkpoint(INGEST_CHECKPOINT)
+    ready = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    watcher = FolderWatcher(folder, ready, checkpoint, use_inotify=use_inotify).start()
+    run_id = start_results_run(os.path.abspath(folder))
+    print(f"Watching {folder} ({watcher.mode}), {len(watcher.done)} files already ingested")
+    processed = 0
+    try:
+        while not stop.is_set():
+            try:
+                batch = drain(ready, batch_size, timeout=0.5)
+            except queue.Empty:
+                continue
+            present = [entry for entry in batch if os.path.exists(entry[0])]
+            watcher.forget([entry for entry in batch if entry not in present])  # Deleted after settling
+            finished = set()
+            try:
+                process(present, batch_size, cache, results, run_id, finished)
+                done = present
+            except Exception as e:
+                done = [entry for entry in present if entry[0] in finished]
+                remaining = [entry for entry in present if entry[0] not in finished]
+                print(f"Error processing batch of {len(present)} files ({e}), retrying {len(remaining)} one by one")
+                for entry in remaining:
+                    try:
+                        process([entry], 1, cache, results, run_id, finished)
+                        done.append(entry)
+                    except Exception as e:
+                        given_up = watcher.retry([entry])
+                        print(f"Error processing {entry[0]}: {e}" + (" (giving up)" if given_up else ""))
+                        if given_up:
+                            checkpoint.mark(given_up)
+                            watcher.mark_done(given_up)
+            checkpoint.mark(done)
+            watcher.mark_done(done)
+            processed += len(done)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        checkpoint.close()
+        close_stores(cache, results)
+        print(f"Ingested {processed} files")
+    return processed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a folder and detect defects in new images")
+    parser.add_argument("--folder", default=IMAGE_FOLDER)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--poll", action="store_true", help="Use os.scandir polling instead of inotify")
+    args = parser.parse_args(argv)
+    run(args.folder, args.batch_size, use_inotify=not args.poll)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# core/lazy.py (Deferred, thread-safe model loading)
+import logging
+import threading
+
+def resolve_device(device=None):
+    # torch is only imported once something actually needs a device
+    if device is not None:
+        return str(device)
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+class LazyModel:
+    """Load a YOLO model on first use, at most once, from whichever thread asks first.
+
+    Importing torch/ultralytics and reading the weights are deferred until get() (or
+    load_async()) is called, so windows and --help come up without paying for them.
+    """
+
+    def __init__(self, model_path, device=None, backend="torch"):
+        self.model_path = model_path
+        self.backend = backend
+        self.requested_device = device
+        self.device = None
+        self.error = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from core.backends import load_backend
+                    device = resolve_device(self.requested_device) if self.backend == "torch" else "cpu"
+                    logging.info(f"Loading model {self.model_path} ({self.backend} backend) on {device}")
+                    self._model, self.device = load_backend(self.model_path, self.backend, device)
+        return self._model
+
+    def load_async(self, on_done=None):
+        """Start loading in a background thread; on_done(error_or_None) runs on that thread."""
+        def load():
+            try:
+                self.get()
+            except Exception as e:
+                self.error = e
+                logging.error(f"Failed to load model: {e}")
+            if on_done is not None:
+                on_done(self.error)
+        thread = threading.Thread(target=load, name="model-loader", daemon=True)
+        thread.start()
+        return thread
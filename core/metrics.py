@@ -0,0 +1,132 @@
+# core/metrics.py (Per-stage latency histograms, counters and a Prometheus text endpoint)
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class StageHistogram:
+    """Cumulative bucket counts for Prometheus plus a rolling window for percentiles and rate."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window=300):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)  # (timestamp, seconds)
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+        self.recent.append((time.perf_counter(), seconds))
+
+    def percentile(self, q):
+        values = sorted(seconds for _, seconds in self.recent)
+        if not values:
+            return 0.0
+        return values[min(int(q * len(values)), len(values) - 1)]
+
+    def rate(self):
+        """Observations per second over the rolling window."""
+        if len(self.recent) < 2:
+            return 0.0
+        span = self.recent[-1][0] - self.recent[0][0]
+        return (len(self.recent) - 1) / span if span > 0 else 0.0
+
+class MetricsRegistry:
+    def __init__(self, prefix="fabric"):
+        self.prefix = prefix
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = StageHistogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def set(self, counter, value):
+        with self._lock:
+            self.counters[counter] = value
+
+    def p95(self, stage):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            return histogram.percentile(0.95) if histogram else 0.0
+
+    def rate(self, stage):
+        with self._lock:
+            histogram = self.stages.get(stage)
+            return histogram.rate() if histogram else 0.0
+
+    def prometheus_text(self):
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [f"# HELP {name} Time spent per pipeline stage.", f"# TYPE {name} histogram"]
+        with self._lock:
+            for stage, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            for counter, value in sorted(self.counters.items()):
+                metric = f"{self.prefix}_{counter}"
+                lines.append(f"# TYPE {metric} {'counter' if counter.endswith('_total') else 'gauge'}")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            f.write(self.prometheus_text())
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve /metrics in Prometheus text format from a daemon thread."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+METRICS = MetricsRegistry()
@@ -1,28 +1,238 @@
 # core/model.py (Model loading and processing)
-from ultralytics import YOLO
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
 import cv2
+import numpy as np
 import os
-import random
-from config.settings import DEVICE, MODEL_PATH, CLASS_MAPPING, DETECTED_FOLDER
+from config.settings import (DEVICE, MODEL_PATH, CONF_THRESHOLD, CLASS_NAMES, CLASS_MAPPING, DETECTED_FOLDER, BATCH_SIZE,
+                             DECODE_WORKERS, WRITE_WORKERS, PREFETCH_SIZE,
+                             CACHE_ENABLED, CACHE_PATH, CACHE_MAX_BYTES, RESULTS_ENABLED, RESULTS_PATH, SAVE_CROPS, CROP_PADDING, JPEG_QUALITY,
+                             TILED_INFERENCE, TILE_SIZE, TILE_OVERLAP, TILE_MERGE_IOU, INFERENCE_BACKEND)
+from core.pipeline import prefetch_decode, batched, WriterPool
+from core.cache import DetectionCache, file_digest, bytes_digest
+from core.results import ResultStore
+from core.output import annotated_path, crop_path, write_outputs
+from core.lazy import LazyModel
+from core.backends import backend_weights
+from core.tiling import make_tiles, merge_tile_detections
+from core.detections import Detections
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+PREDICT_ARGS = {"save": False, "show": False, "conf": CONF_THRESHOLD}
 
 os.makedirs(DETECTED_FOLDER, exist_ok=True)
+if SAVE_CROPS:
+    os.makedirs(os.path.join(DETECTED_FOLDER, "crops"), exist_ok=True)
+
+_model = LazyModel(MODEL_PATH, DEVICE, INFERENCE_BACKEND)
+_model_digest = None
+
+def get_model():
+    # Loaded on first inference, so importing this module (and opening the gallery) stays cheap
+    return _model.get()
+
+def list_images(folder_path):
+    return [os.path.join(folder_path, filename) for filename in os.listdir(folder_path)
+            if filename.lower().endswith(IMAGE_EXTENSIONS)]
+
+def decode_image(data):
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+def load_image(img_path, is_cached=None):
+    # Read the file once: the raw bytes give the cache key. Cached images are not decoded
+    # here; their bytes are kept in case the outputs have to be written again.
+    # Returns (digest, image, None), (digest, None, data) for a cache hit, or None if unreadable.
+    try:
+        with open(img_path, "rb") as f:
+            data = f.read()
+    except OSError:  # A directory, a file deleted since listing, no permission...
+        return None
+    digest = bytes_digest(data)
+    if is_cached is not None and is_cached(digest):
+        return digest, None, data
+    image = decode_image(data)
+    if image is None:
+        return None
+    return digest, image, None
+
+def model_digest():
+    global _model_digest
+    if _model_digest is None:
+        # Hash the weights the backend actually loads, so an ONNX re-export invalidates the cache
+        _model_digest = file_digest(backend_weights(MODEL_PATH, INFERENCE_BACKEND))
+    return _model_digest
+
+def model_version():
+    # Short weights hash plus backend, recorded with every stored detection
+    return f"{model_digest()[:12]}/{INFERENCE_BACKEND}"
+
+def start_results_run(source=None):
+    # Returns a run id for the results store, or None when it is disabled
+    if not RESULTS_ENABLED:
+        return None
+    store = ResultStore(RESULTS_PATH)
+    try:
+        return store.start_run(source, model_version(), {key: value for key, value in PREDICT_ARGS.items()
+                                                         if key not in ("save", "show")})
+    finally:
+        store.close()
+
+def open_cache():
+    if not CACHE_ENABLED:
+        return None
+    params = {key: value for key, value in PREDICT_ARGS.items() if key not in ("save", "show")}
+    params["backend"] = INFERENCE_BACKEND
+    if TILED_INFERENCE:
+        params["tiling"] = {"size": TILE_SIZE, "overlap": TILE_OVERLAP, "merge_iou": TILE_MERGE_IOU}
+    return DetectionCache(CACHE_PATH, model_digest(), params, CACHE_MAX_BYTES)
+
+def predict_images(images):
+    # Whole images in one model call; YOLO letterboxes each one down to its input size
+    results = get_model().predict(source=images, device=_model.device, **PREDICT_ARGS)
+    return [Detections.from_result(result) for result in results]
+
+def predict_tiled(images, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, iou_threshold=TILE_MERGE_IOU):
+    # Overlapping tiles from all images go through the model in BATCH_SIZE chunks, then each
+    # image's tile detections are shifted back and merged with NMS across tile borders
+    tiles, owners, origins = [], [], []
+    for owner, image in enumerate(images):
+        for x0, y0, tile in make_tiles(image, tile_size, int(tile_size * overlap)):
+            tiles.append(tile)
+            owners.append(owner)
+            origins.append((x0, y0))
+
+    tile_detections = []
+    for start in range(0, len(tiles), BATCH_SIZE):
+        tile_detections.extend(predict_images(tiles[start:start + BATCH_SIZE]))
+
+    merged = []
+    for owner in range(len(images)):
+        picks = [k for k, tile_owner in enumerate(owners) if tile_owner == owner]
+        merged.append(Detections(*merge_tile_detections([tile_detections[k] for k in picks], [origins[k] for k in picks], iou_threshold)))
+    return merged
+
+def detect_batch(batch, cache=None):
+    # Returns Detections per image, running the model only on cache misses,
+    # and the set of batch indices that were served from the cache
+    detections = [None] * len(batch)
+    if cache is not None:
+        for i, (_, (digest, _, _)) in enumerate(batch):
+            cached = cache.get(digest)
+            if cached is not None:
+                detections[i] = Detections(cached["boxes"], cached["classes"], cached["confidences"])
+
+    misses = [i for i, found in enumerate(detections) if found is None]
+    for i in misses:
+        img_path, (digest, image, data) = batch[i]
+        if image is None:  # Looked cached when loaded, but evicted since
+            batch[i] = img_path, (digest, decode_image(data), None)
+    misses = [i for i in misses if batch[i][1][1] is not None]
+    if misses:
+        predict = predict_tiled if TILED_INFERENCE else predict_images
+        for i, found in zip(misses, predict([batch[i][1][1] for i in misses])):
+            detections[i] = found
+            if cache is not None:
+                cache.put(batch[i][1][0], *found.to_lists())
+    hits = {i for i, found in enumerate(detections) if found is not None} - set(misses)
+    return [found if found is not None else Detections.empty() for found in detections], hits
+
+def _completed():
+    future = Future()
+    future.set_result(None)
+    return future
+
+def open_results():
+    # ResultStore every detection is logged to, or None when it is disabled
+    return ResultStore(RESULTS_PATH) if RESULTS_ENABLED else None
+
+def close_stores(cache, results):
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Detection cache: {stats['hits']} hits, {stats['misses']} misses, {stats['evictions']} evictions")
+        cache.close()
+    if results is not None:
+        results.close()
+
+def _finished_items(entry, results):
+    # A file's detections are logged only once its outputs are written, so a failed
+    # write leaves no row behind and a retry of the file does not duplicate any
+    future, items, row = entry
+    future.result()
+    if results is not None:
+        results.add(*row)
+    return items
+
+def detect_files(img_paths, cache, results, run_id, batch_size=BATCH_SIZE, ramp_up=True):
+    # Decoder pool -> bounded prefetch queue -> batched inference (this thread) -> writer pool.
+    # Yields (img_path, obj_class, confidence, img_save_path) in input order as soon as each
+    # output file is on disk, logging every file's detections to results under run_id.
+    # cache and results (either may be None) stay open, so long-running callers open them once.
+    batch_size = max(1, batch_size)
+    load = partial(load_image, is_cached=cache.has if cache is not None else None)
+    decoded = prefetch_decode(img_paths, DECODE_WORKERS, max(PREFETCH_SIZE, batch_size), load)
+    pending = deque()
+    with WriterPool(WRITE_WORKERS, PREFETCH_SIZE) as writer:
+        for batch in batched(decoded, batch_size, ramp_up=ramp_up):
+            detections, cache_hits = detect_batch(batch, cache)
+            for i, ((img_path, (_, image, data)), found) in enumerate(zip(batch, detections)):
+                found = found.filter(classes=CLASS_MAPPING)
+                if not len(found):
+                    continue
+                boxes, confidences = found.boxes, found.confidences
+                valid_classes = found.labels(CLASS_NAMES)
+
+                # One encode of the annotated image per source file, plus optional per-box crops
+                full_path = annotated_path(DETECTED_FOLDER, img_path)
+                crop_paths = [crop_path(DETECTED_FOLDER, img_path, index, obj_class)
+                              for index, obj_class in enumerate(valid_classes)] if SAVE_CROPS else None
+                if i in cache_hits and all(os.path.exists(path) for path in [full_path] + (crop_paths or [])):
+                    # Same image, weights and names as a previous run: the outputs are already on disk
+                    future = _completed()
+                else:
+                    if image is None:
+                        image = decode_image(data)  # Cache hit whose outputs went missing
+                        if image is None:
+                            continue
+                    future = writer.submit(write_outputs, image, found, CLASS_NAMES,
+                                           full_path, crop_paths, CROP_PADDING, JPEG_QUALITY)
+                save_paths = crop_paths or [full_path] * len(valid_classes)
+                items = [(img_path, obj_class, confidence, img_save_path) for obj_class, confidence, img_save_path
+                         in zip(valid_classes, confidences.tolist(), save_paths)]
+                # Absolute paths, so the gallery can open a stored run from any working directory
+                row = (run_id, os.path.abspath(img_path), os.path.abspath(full_path), valid_classes,
+                       confidences.tolist(), boxes.tolist(), model_version()) if results is not None else None
+                pending.append((future, items, row))
+            if cache is not None:
+                cache.flush()
+
+            while pending and pending[0][0].done():
+                yield from _finished_items(pending.popleft(), results)
+            if results is not None:
+                results.flush()
+
+        while pending:
+            yield from _finished_items(pending.popleft(), results)
+        if results is not None:
+            results.flush()
+
+def iter_file_detections(img_paths, batch_size=BATCH_SIZE, ramp_up=True, run_id=None, source=None):
+    # detect_files with the cache and results store opened for this call only
+    # (a new results run is started when no run_id is given)
+    cache = open_cache()
+    results = open_results()
+    if results is not None and run_id is None:
+        run_id = start_results_run(source)
+    try:
+        yield from detect_files(img_paths, cache, results, run_id, batch_size, ramp_up)
+    finally:
+        close_stores(cache, results)
+
+def iter_detections(folder_path, batch_size=BATCH_SIZE, ramp_up=True):
+    # Yields (obj_class, img_save_path) for every detection in the folder
+    for _, obj_class, _, img_save_path in iter_file_detections(list_images(folder_path), batch_size, ramp_up,
+                                                               source=os.path.abspath(folder_path)):
+        yield obj_class, img_save_path
 
-model = YOLO(MODEL_PATH).to(DEVICE)
-
-def process_images(folder_path):
-    detected_files = []
-    
-    for filename in os.listdir(folder_path):
-        if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-            img_path = os.path.join(folder_path, filename)
-            image = cv2.imread(img_path)
-            results = model.predict(source=image, save=False, show=False, device=DEVICE)
-            class_ids = results[0].boxes.cls.cpu().numpy().astype(int) if results[0].boxes else []
-
-            valid_classes = [CLASS_MAPPING[class_id] for class_id in class_ids if class_id in CLASS_MAPPING]
-            for obj_class in valid_classes:
-                img_save_path = f"{DETECTED_FOLDER}/{obj_class}_{random.randint(0,9999)}.jpg"
-                cv2.imwrite(img_save_path, image)
-                detected_files.append((obj_class, img_save_path))
-    
-    return detected_files
\ No newline at end of file
+def process_images(folder_path, batch_size=BATCH_SIZE):
+    return list(iter_detections(folder_path, batch_size, ramp_up=False))
@@ -0,0 +1,147 @@
+# core/multistream.py (Concurrent capture from several cameras with one batched model call per tick)
+# Usage: python -m core.multistream SOURCE [SOURCE ...] [--duration 10]
+#   SOURCE is a camera index, stream URL or video file (files are paced to their FPS and looped)
+#   live.py runs it over every Settings.CAMERA_SOURCES entry when Settings.MULTI_CAMERA is on
+import argparse
+import logging
+import os
+import threading
+import time
+import cv2
+from core.streaming import CaptureThread, LatestSlot, Result
+
+class StreamStats:
+    def __init__(self):
+        self.results = 0
+        self.fps = 0.0
+        self.latency = 0.0  # Seconds from capture to result, smoothed
+        self.last_result_at = None
+
+    def record(self, captured_at, now):
+        if self.last_result_at is not None:
+            interval = max(now - self.last_result_at, 1e-6)
+            self.fps += 0.1 * (1.0 / interval - self.fps) if self.fps else 1.0 / interval
+        latency = now - captured_at
+        self.latency += 0.1 * (latency - self.latency) if self.results else latency
+        self.last_result_at = now
+        self.results += 1
+
+def open_source(source):
+    """Open a camera index, URL or file; returns (cap, fps_limit, loop)."""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if isinstance(source, str) and os.path.isfile(source):
+        return cap, cap.get(cv2.CAP_PROP_FPS) or 25.0, True
+    return cap, None, False
+
+class MultiStreamPipeline:
+    """One capture thread per source feeding latest-frame slots, and one batching thread.
+
+    Every tick the batcher takes the newest unseen frame from each stream, runs
+    process_batch(images) once for all of them and publishes per-stream Results, so N
+    cameras cost one model call per tick instead of N.
+    """
+
+    def __init__(self, sources, process_batch, max_fps=None):
+        self.process_batch = process_batch
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.names = list(sources)
+        self.captures = {}
+        self.frames = {}
+        self.results = {}
+        self.stats = {}
+        for name, source in sources.items():
+            cap, fps_limit, loop = open_source(source)
+            self.frames[name] = LatestSlot()
+            self.results[name] = LatestSlot()
+            self.stats[name] = StreamStats()
+            self.captures[name] = CaptureThread(cap, self.frames[name], fps_limit, loop, name=f"capture-{name}")
+        self.batches = 0
+        self.batch_sizes = 0
+        self.errors = 0
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="batcher", daemon=True)
+
+    def start(self):
+        for capture in self.captures.values():
+            capture.start()
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            tick = time.perf_counter()
+            ready = [(name, self.frames[name].get_nowait()) for name in self.names]
+            ready = [(name, frame) for name, frame in ready if frame is not None]
+            if not ready:
+                self._stop_event.wait(0.002)
+                continue
+
+            start = time.perf_counter()
+            try:
+                outputs = self.process_batch([frame.image for _, frame in ready])
+            except Exception as e:
+                # Drop this tick's frames and keep going, as InferenceWorker does
+                self.errors += 1
+                logging.error(f"Error processing batch of {len(ready)} frames: {e}")
+                outputs = None
+            if outputs is not None:
+                now = time.perf_counter()
+                for (name, frame), output in zip(ready, outputs):
+                    self.results[name].put(Result(frame.index, frame.captured_at, now - start, (frame.image, output)))
+                    self.stats[name].record(frame.captured_at, now)
+                self.batches += 1
+                self.batch_sizes += len(ready)
+
+            remaining = self.min_interval - (time.perf_counter() - tick)
+            if remaining > 0:
+                self._stop_event.wait(remaining)
+
+    def latest(self, name):
+        """Newest (image, output) Result for one stream, or None if nothing new."""
+        return self.results[name].get_nowait()
+
+    def summary(self):
+        return {
+            name: {
+                "captured": self.captures[name].captured,
+                "processed": stats.results,
+                "dropped": self.frames[name].dropped,
+                "fps": round(stats.fps, 2),
+                "latency_ms": round(stats.latency * 1000, 1),
+            }
+            for name, stats in self.stats.items()
+        } | {"_batches": {"count": self.batches, "mean_size": round(self.batch_sizes / max(self.batches, 1), 2),
+                        "errors": self.errors}}
+
+    def stop(self):
+        self._stop_event.set()
+        for capture in self.captures.values():
+            capture.stop()
+        self._thread.join(timeout=2.0)
+        for capture in self.captures.values():
+            capture.join(timeout=1.0)
+            if capture.cap is not None:
+                capture.cap.release()
+
+def main(argv=None):
+    from core.model import predict_images
+    parser = argparse.ArgumentParser(description="Run batched defect detection over several camera streams")
+    parser.add_argument("sources", nargs="+", help="Camera index, stream URL or video file")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--max-fps", type=float, default=None, help="Cap on batched model calls per second")
+    args = parser.parse_args(argv)
+
+    sources = {f"cam{i}": source for i, source in enumerate(args.sources)}
+    pipeline = MultiStreamPipeline(sources, predict_images, args.max_fps).start()
+    try:
+        end = time.perf_counter() + args.duration
+        while time.perf_counter() < end:
+            time.sleep(1.0)
+            print(pipeline.summary(), flush=True)
+    finally:
+        pipeline.stop()
+
+if __name__ == "__main__":
+    main()
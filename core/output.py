@@ -0,0 +1,34 @@
+# core/output.py (Annotated image and per-defect crop output)
+import hashlib
+import os
+import cv2
+
+def output_stem(img_path):
+    # Source file name plus a short hash of its absolute path: stable across runs and
+    # unique even when two input folders contain files with the same name
+    stem = os.path.splitext(os.path.basename(img_path))[0]
+    tag = hashlib.sha1(os.path.abspath(img_path).encode()).hexdigest()[:8]
+    return f"{stem}_{tag}"
+
+def annotated_path(output_folder, img_path):
+    return os.path.join(output_folder, f"{output_stem(img_path)}.jpg")
+
+def crop_path(output_folder, img_path, box_index, obj_class):
+    return os.path.join(output_folder, "crops", f"{output_stem(img_path)}_{box_index:03d}_{obj_class}.jpg")
+
+def write_outputs(image, detections, class_names, full_path, crop_paths=None, padding=0, jpeg_quality=90):
+    """Write per-box crops (from the clean image) and then the annotated image, encoding each once.
+
+    Runs on a writer thread and draws on `image` in place, so callers must not reuse it.
+    """
+    params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+    if crop_paths:
+        height, width = image.shape[:2]
+        for (x1, y1, x2, y2), path in zip(detections.boxes.astype(int).tolist(), crop_paths):
+            x1, y1 = max(x1 - padding, 0), max(y1 - padding, 0)
+            x2, y2 = min(x2 + padding, width), min(y2 + padding, height)
+            if x2 > x1 and y2 > y1:
+                cv2.imwrite(path, image[y1:y2, x1:x2], params)
+    detections.draw(image, class_names)
+    if not cv2.imwrite(full_path, image, params):
+        raise IOError(f"Failed to write {full_path}")
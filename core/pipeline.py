@@ -0,0 +1,101 @@
+# core/pipeline.py (Staged decode / write helpers for folder processing)
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+_DONE = object()
+
+def prefetch_decode(img_paths, num_workers, prefetch_size, load=cv2.imread):
+    """Yield (img_path, load(img_path)) in input order while a worker pool decodes ahead.
+
+    At most prefetch_size decoded images are waiting at any time, so memory stays
+    bounded however far ahead the decoders could run. Paths for which load returns
+    None are skipped.
+    """
+    pending = queue.Queue(maxsize=max(1, prefetch_size))
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, num_workers), thread_name_prefix="decode")
+
+    def feed():
+        try:
+            for img_path in img_paths:
+                future = executor.submit(load, img_path)
+                while not stop.is_set():
+                    try:
+                        pending.put((img_path, future), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    future.cancel()
+                    return
+        finally:
+            while not stop.is_set():
+                try:
+                    pending.put(_DONE, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    feeder = threading.Thread(target=feed, name="decode-feeder", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is _DONE:
+                break
+            img_path, future = item
+            image = future.result()
+            if image is None:
+                print(f"Skipping unreadable image: {img_path}")
+                continue
+            yield img_path, image
+    finally:
+        stop.set()
+        feeder.join()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def batched(items, batch_size, ramp_up=False):
+    # With ramp_up, batch sizes go 1, 2, 4, ... up to batch_size so the first
+    # results come back after a single-image call instead of a full batch
+    limit = 1 if ramp_up else batch_size
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= limit:
+            yield batch
+            batch = []
+            limit = min(limit * 2, batch_size)
+    if batch:
+        yield batch
+
+class WriterPool:
+    """Run image-writing jobs off the inference thread with a bounded backlog."""
+
+    def __init__(self, num_workers, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, num_workers), thread_name_prefix="write")
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+        self.errors = []
+
+    def submit(self, func, *args):
+        self.slots.acquire()  # Blocks inference when writers fall behind
+        future = self.executor.submit(func, *args)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        self.slots.release()
+        if future.exception() is not None:
+            self.errors.append(future.exception())
+
+    def close(self, raise_errors=True):
+        self.executor.shutdown(wait=True)
+        if raise_errors and self.errors:
+            raise self.errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(raise_errors=exc_type is None)
@@ -0,0 +1,297 @@
+# core/recording.py (Record live sessions and replay them without a camera)
+# Usage: python -m core.recording SESSION_DIR [--app robo|live] [--realtime] [--check] [--min-agreement 0.9]
+#   Replays a recorded session frame by frame through the app's own process_frame and reports
+#   latency and how well the detections agree with the ones recorded on the line
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from core.detections import Detections
+from core.tiling import box_iou
+
+INDEX_FILE = "frames.jsonl"
+
+def _segment_name(segment):
+    return f"segment_{segment:04d}.mp4"
+
+class SessionRecorder:
+    """Writes inferred frames to compressed video segments plus a JSON-lines frame index.
+
+    Each index line holds the segment, position in it, frame number, capture time
+    (seconds from session start), the model input size and the detections (null while the
+    model was loading). A new segment starts every segment_seconds and whenever the frame
+    size changes (e.g. on a camera switch). Recording into a folder that already holds a
+    session continues its frame numbers and clock. Encoding runs on its own thread; when
+    it falls behind, frames are dropped and counted rather than slowing the inference thread.
+    """
+
+    def __init__(self, folder, segment_seconds=60.0, fps=30.0, fourcc="mp4v", max_pending=64):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.segment_seconds = segment_seconds
+        self.fps = fps
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.queued = 0
+        self.recorded = 0
+        self.dropped = 0
+        self.started_at = None
+        # Continue an earlier session in this folder, so index and t keep increasing
+        previous = load_index(folder)[-1:] if os.path.exists(os.path.join(folder, INDEX_FILE)) else []
+        self._first_index = previous[0]["index"] + 1 if previous else 0
+        self._time_offset = previous[0]["t"] + 1.0 / fps if previous else 0.0
+        self._index = open(os.path.join(folder, INDEX_FILE), "a")
+        self._writer = None
+        self._segment = len([name for name in os.listdir(folder) if name.startswith("segment_")])
+        self._segment_start = None
+        self._frame_size = None
+        self._position = 0
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    def write(self, image, detections=None, captured_at=None, imgsz=None):
+        """Queue a copy of a frame (the caller keeps ownership of its array) with its Detections.
+
+        captured_at is the frame's perf_counter() capture time; it defaults to now. imgsz is
+        the model input size the detections were made at, so replays can use the same one.
+        """
+        captured_at = time.perf_counter() if captured_at is None else captured_at
+        if self.started_at is None:
+            self.started_at = captured_at
+        t = self._time_offset + captured_at - self.started_at
+        try:
+            self.pending.put_nowait((self._first_index + self.queued, t, image.copy(), detections, imgsz))
+            self.queued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _open_segment(self, image, t):
+        if self._writer is not None:
+            self._writer.release()
+            self._segment += 1
+        height, width = image.shape[:2]
+        self._writer = cv2.VideoWriter(os.path.join(self.folder, _segment_name(self._segment)),
+                                       self.fourcc, self.fps, (width, height))
+        self._segment_start = t
+        self._frame_size = (height, width)
+        self._position = 0
+
+    def _run(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            index, t, image, detections, imgsz = item
+            # VideoWriter silently drops frames of another size, so those start a new segment
+            if (self._writer is None or t - self._segment_start >= self.segment_seconds
+                    or image.shape[:2] != self._frame_size):
+                self._open_segment(image, t)
+            self._writer.write(image)
+            record = {"segment": self._segment, "pos": self._position, "index": index, "t": round(t, 6),
+                      "imgsz": imgsz, "detections": None}
+            if detections is not None:
+                boxes, classes, confidences = detections.to_lists()
+                record["detections"] = {"boxes": boxes, "classes": classes, "confidences": confidences}
+            self._index.write(json.dumps(record) + "\n")
+            self._position += 1
+            self.recorded += 1
+
+    def close(self):
+        self.pending.put(None)
+        self._thread.join()
+        if self._writer is not None:
+            self._writer.release()
+        self._index.close()
+        logging.info(f"Recorded {self.recorded} frames to {self.folder} ({self.dropped} dropped)")
+
+def load_index(folder):
+    with open(os.path.join(folder, INDEX_FILE)) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def recorded_detections(record):
+    found = record["detections"]
+    if found is None:
+        return None
+    return Detections(found["boxes"], found["classes"], found["confidences"])
+
+class ReplayCapture:
+    """cv2.VideoCapture stand-in that plays a recorded session back.
+
+    With realtime=True reads are paced to the recorded capture times (scaled by speed);
+    otherwise frames come as fast as they can be decoded. The recorded detections of the
+    frame last read are in `record`. Plugs into LivePipeline / CaptureThread unchanged for
+    watching a session in the app; that path drops frames like a camera does, so use
+    replay() for comparisons.
+    """
+
+    def __init__(self, folder, realtime=True, speed=1.0, loop=False):
+        self.folder = folder
+        self.records = load_index(folder)
+        self.realtime = realtime
+        self.speed = speed
+        self.loop = loop
+        self.record = None
+        self._next = 0
+        self._segment = None
+        self._video = None
+        self._clock_start = None
+        self._opened = bool(self.records)
+
+    def isOpened(self):
+        return self._opened
+
+    def _open(self, segment):
+        if self._video is not None:
+            self._video.release()
+        self._video = cv2.VideoCapture(os.path.join(self.folder, _segment_name(segment)))
+        self._segment = segment
+
+    def read(self):
+        if not self._opened:
+            return False, None
+        if self._next >= len(self.records):
+            if not self.loop:
+                self.release()
+                return False, None
+            self._next, self._clock_start = 0, None
+            self._segment = None
+        record = self.records[self._next]
+        if record["segment"] != self._segment:
+            self._open(record["segment"])
+        ok, image = self._video.read()
+        if not ok:
+            self.release()
+            return False, None
+        if self.realtime:
+            now = time.perf_counter()
+            if self._clock_start is None:
+                self._clock_start = now - record["t"] / self.speed
+            time.sleep(max(self._clock_start + record["t"] / self.speed - now, 0))
+        self._next += 1
+        self.record = record
+        return True, image
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES and int(value) == 0:
+            self._next, self._clock_start, self._segment = 0, None, None
+            return True
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.records))
+        return 0.0
+
+    def release(self):
+        self._opened = False
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+def agreement(recorded, current, iou_threshold=0.5):
+    """Fraction of boxes (from both sides) matched by a same-class box with IoU >= threshold."""
+    total = len(recorded) + len(current)
+    if total == 0:
+        return 1.0
+    matched = 0
+    used = np.zeros(len(current), bool)
+    for box, class_id in zip(recorded.boxes, recorded.class_ids.tolist()):
+        if not len(current):
+            break
+        ious = box_iou(box, current.boxes)
+        ious[(current.class_ids != class_id) | used] = 0
+        best = int(np.argmax(ious))
+        if ious[best] >= iou_threshold:
+            used[best] = True
+            matched += 2
+    return matched / total
+
+class _RecordedInputSize:
+    """Scheduler stand-in for replays: the input size recorded with each frame, never adapted."""
+
+    def __init__(self, imgsz):
+        self.imgsz = imgsz
+
+    def record_inference(self, seconds):
+        pass
+
+class _LastWrite:
+    """Recorder stand-in for replays: keeps the detections the app would have recorded."""
+
+    def __init__(self):
+        self.detections = None
+
+    def write(self, image, detections=None, captured_at=None, imgsz=None):
+        self.detections = detections
+
+def replay(folder, app, realtime=False):
+    """Feed every recorded frame to app.process_frame in order and in lockstep, without drops.
+
+    app is a windowless live/robo app (headless_app() in live.py / robo.py), so replays run
+    the same change gate, ROI crops and tracking as the line. Its scheduler is pinned to the
+    input size recorded with each frame and its recorder is swapped for one that keeps the
+    detections, which are compared with the recorded ones. Frames recorded while the model
+    was loading are skipped, as the app skipped them. Returns per-frame dicts with the
+    processing latency and agreement with the recording.
+    """
+    cap = ReplayCapture(folder, realtime=realtime)
+    default_imgsz = app.scheduler.imgsz
+    app.scheduler = _RecordedInputSize(default_imgsz)
+    app.recorder = _LastWrite()
+    frames = []
+    while True:
+        ok, image = cap.read()
+        if not ok:
+            break
+        recorded = recorded_detections(cap.record)
+        if recorded is None:
+            continue
+        app.scheduler.imgsz = cap.record.get("imgsz") or default_imgsz
+        start = time.perf_counter()
+        app.process_frame(image)
+        latency = time.perf_counter() - start
+        found = app.recorder.detections
+        frames.append({"index": cap.record["index"], "latency": latency, "detections": len(found),
+                       "agreement": agreement(recorded, found)})
+    return frames
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded live session through the app that recorded it")
+    parser.add_argument("session", help="Folder written by SessionRecorder")
+    parser.add_argument("--app", choices=("robo", "live"), default="robo", help="App whose process_frame to replay through")
+    parser.add_argument("--realtime", action="store_true", help="Pace frames to the recorded timestamps")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if detections drift from the recording")
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)  # Before importing robo, so replays stay out of fabric_robot.log
+    import importlib
+    app = importlib.import_module(args.app).headless_app()
+    start = time.perf_counter()
+    frames = replay(args.session, app, args.realtime)
+    elapsed = time.perf_counter() - start
+    if not frames:
+        print(f"No inferred frames recorded in {args.session}")
+        return 1
+    latencies = np.array([frame["latency"] for frame in frames]) * 1000
+    mean_agreement = float(np.mean([frame["agreement"] for frame in frames]))
+    print(json.dumps({
+        "frames": len(frames),
+        "fps": round(len(frames) / elapsed, 2),
+        "latency_ms": {"p50": round(float(np.percentile(latencies, 50)), 2),
+                       "p95": round(float(np.percentile(latencies, 95)), 2)},
+        "detections": sum(frame["detections"] for frame in frames),
+        "agreement": round(mean_agreement, 4),
+    }, indent=2))
+    if args.check and mean_agreement < args.min_agreement:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# core/results.py (Indexed store of every detection)
+import json
+import os
+import sqlite3
+import time
+
+class ResultStore:
+    """Append-only SQLite log of detections: one row per box, grouped into runs.
+
+    Rows hold source path, output path, class, confidence, box (xyxy), model version and
+    timestamp, with indexes on class, confidence and run so filtered pages come back
+    without touching the images or the model.
+    """
+
+    COLUMNS = ("id", "run_id", "source", "output", "class", "confidence",
+               "x1", "y1", "x2", "y2", "model_version", "created")
+
+    def __init__(self, db_path):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL NOT NULL, source TEXT,"
+            " model_version TEXT, settings TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS detections ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, run_id INTEGER NOT NULL REFERENCES runs (id),"
+            " source TEXT NOT NULL, output TEXT, class TEXT NOT NULL, confidence REAL NOT NULL,"
+            " x1 REAL, y1 REAL, x2 REAL, y2 REAL, model_version TEXT, created REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_results_class_conf ON detections (class, confidence)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_results_conf ON detections (confidence)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_results_run ON detections (run_id, class)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_results_created ON detections (created)")
+        self.conn.commit()
+
+    def start_run(self, source=None, model_version=None, settings=None):
+        cursor = self.conn.execute(
+            "INSERT INTO runs (started, source, model_version, settings) VALUES (?, ?, ?, ?)",
+            (time.time(), source, model_version, json.dumps(settings or {}, sort_keys=True, default=str)),
+        )
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def add(self, run_id, source, output, labels, confidences, boxes, model_version=None):
+        # One executemany per image; committed by flush()
+        now = time.time()
+        self.conn.executemany(
+            "INSERT INTO detections (run_id, source, output, class, confidence, x1, y1, x2, y2, model_version, created)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(run_id, source, output, label, float(conf), *map(float, box), model_version, now)
+             for label, conf, box in zip(labels, confidences, boxes)],
+        )
+
+    def latest_run(self):
+        row = self.conn.execute("SELECT MAX(id) FROM runs").fetchone()
+        return row[0]
+
+    def runs(self, limit=20):
+        rows = self.conn.execute(
+            "SELECT r.id, r.started, r.source, r.model_version, COUNT(d.id) FROM runs r"
+            " LEFT JOIN detections d ON d.run_id = r.id GROUP BY r.id ORDER BY r.id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [dict(zip(("id", "started", "source", "model_version", "detections"), row)) for row in rows]
+
+    def query(self, obj_class=None, min_conf=None, run_id=None, since=None, limit=500, offset=0):
+        """Return detection rows as dicts, highest confidence first."""
+        clauses, args = [], []
+        if obj_class is not None:
+            clauses.append("class = ?")
+            args.append(obj_class)
+        if min_conf is not None:
+            clauses.append("confidence >= ?")
+            args.append(min_conf)
+        if run_id is not None:
+            clauses.append("run_id = ?")
+            args.append(run_id)
+        if since is not None:
+            clauses.append("created >= ?")
+            args.append(since)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM detections{where} ORDER BY confidence DESC, id LIMIT ? OFFSET ?",
+            args + [limit, offset],
+        ).fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def flush(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
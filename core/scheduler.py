@@ -0,0 +1,93 @@
+# core/scheduler.py (Deadline pacing and latency budget for the live loop)
+import threading
+import time
+from collections import deque
+
+class FrameScheduler:
+    """Keeps the live loop at target_fps within an end-to-end latency budget.
+
+    The render loop asks next_delay_ms() for its after() delay, which counts to fixed
+    deadlines (one period apart) instead of adding a delay after the work, so the interval
+    does not drift with load. The inference thread reports each model call through
+    record_inference(); once a window of calls is over the inference limit (one frame
+    period, or less if the latency budget needs it) the model input size steps down through
+    input_sizes, and steps back up when the larger size is predicted to fit with headroom.
+    Rendered results whose capture-to-render age exceeds the budget count as misses.
+    """
+
+    def __init__(self, target_fps, latency_budget, input_sizes=(640,), window=20, headroom=0.7, metrics=None):
+        self.period = 1.0 / target_fps
+        self.latency_budget = latency_budget
+        # Worst case a result waits up to one render period after inference, so inference
+        # gets what is left of the budget, and never more than a frame period
+        self.inference_limit = min(self.period, max(latency_budget - self.period, self.period / 2))
+        self.input_sizes = sorted(input_sizes, reverse=True)
+        self.size_index = 0
+        self.window = window
+        self.headroom = headroom
+        self.metrics = metrics
+        self.samples = deque(maxlen=window)
+        self.rendered = 0
+        self.misses = 0
+        self.late_ticks = 0
+        self.size_changes = 0
+        self._next_tick = None
+        self._lock = threading.Lock()
+
+    @property
+    def imgsz(self):
+        return self.input_sizes[self.size_index]
+
+    def record_inference(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+            if len(self.samples) < self.window:
+                return
+            typical = sorted(self.samples)[int(0.9 * (len(self.samples) - 1))]
+            index = self.size_index
+            if typical > self.inference_limit and index < len(self.input_sizes) - 1:
+                index += 1
+            elif index > 0:
+                # Inference cost scales roughly with input area
+                predicted = typical * (self.input_sizes[index - 1] / self.input_sizes[index]) ** 2
+                if predicted < self.headroom * self.inference_limit:
+                    index -= 1
+            if index != self.size_index:
+                self.size_index = index
+                self.size_changes += 1
+                self.samples.clear()
+                if self.metrics is not None:
+                    self.metrics.set("inference_imgsz", self.imgsz)
+
+    def record_result(self, frame_age):
+        self.rendered += 1
+        if frame_age > self.latency_budget:
+            self.misses += 1
+            if self.metrics is not None:
+                self.metrics.inc("latency_budget_miss_total")
+
+    def next_delay_ms(self):
+        """Milliseconds until the next render deadline."""
+        now = time.perf_counter()
+        if self._next_tick is None:
+            self._next_tick = now
+        self._next_tick += self.period
+        if self._next_tick < now:
+            # Fell behind by more than a period: skip the missed ticks rather than bursting
+            self.late_ticks += 1
+            self._next_tick = now + self.period
+        return max(int((self._next_tick - now) * 1000), 1)
+
+    @property
+    def miss_ratio(self):
+        return self.misses / self.rendered if self.rendered else 0.0
+
+    def stats(self):
+        return {
+            "imgsz": self.imgsz,
+            "rendered": self.rendered,
+            "budget_misses": self.misses,
+            "miss_ratio": self.miss_ratio,
+            "late_ticks": self.late_ticks,
+            "size_changes": self.size_changes,
+        }
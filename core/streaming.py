@@ -0,0 +1,201 @@
+# core/streaming.py (Threaded capture -> inference pipeline for the live apps)
+import logging
+import threading
+import time
+from collections import namedtuple
+import cv2
+
+Frame = namedtuple("Frame", ["index", "captured_at", "image"])
+Result = namedtuple("Result", ["index", "captured_at", "inference_time", "output"])
+
+class LatestSlot:
+    """Single-item hand-off where a newer item replaces one nobody has taken yet.
+
+    Consumers always see the most recent item; replaced items are counted in `dropped`
+    instead of queuing up behind a slow consumer.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._fresh = False
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._fresh:
+                self.dropped += 1
+            self._item = item
+            self._fresh = True
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Wait for an item not returned before; None on timeout or close."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._fresh or self._closed, timeout):
+                return None
+            if not self._fresh:
+                return None
+            self._fresh = False
+            return self._item
+
+    def get_nowait(self):
+        with self._cond:
+            if not self._fresh:
+                return None
+            self._fresh = False
+            return self._item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+class CaptureThread(threading.Thread):
+    """Reads a cv2.VideoCapture as fast as it delivers and publishes frames to a LatestSlot.
+
+    For video files, fps_limit paces reads to the recorded rate and loop rewinds at the end,
+    so files can stand in for live cameras.
+    """
+
+    def __init__(self, cap, frames, fps_limit=None, loop=False, name="capture", metrics=None):
+        super().__init__(name=name, daemon=True)
+        self.metrics = metrics
+        self.cap = cap
+        self.frames = frames
+        self.fps_limit = fps_limit
+        self.loop = loop
+        self.captured = 0
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._limit_buffer(cap)
+
+    @staticmethod
+    def _limit_buffer(cap):
+        # Keep the driver from queuing frames so reads return the newest one
+        try:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except Exception:
+            pass
+
+    def replace(self, cap):
+        """Swap in a new capture (e.g. on camera switch) and release the old one."""
+        self._limit_buffer(cap)
+        with self._lock:
+            old, self.cap = self.cap, cap
+        if old is not None and old is not cap:
+            old.release()
+
+    def run(self):
+        next_read = time.perf_counter()
+        while not self._stop_event.is_set():
+            if self.fps_limit:
+                next_read += 1.0 / self.fps_limit
+                self._stop_event.wait(max(next_read - time.perf_counter(), 0))
+            read_start = time.perf_counter()
+            with self._lock:
+                ok, image = self.cap.read() if self.cap is not None and self.cap.isOpened() else (False, None)
+                if not ok and self.loop and self.cap is not None and self.cap.isOpened():
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ok, image = self.cap.read()
+            if not ok:
+                self.consecutive_failures += 1
+                self._stop_event.wait(0.05)
+                continue
+            self.consecutive_failures = 0
+            captured_at = time.perf_counter()
+            if self.metrics is not None:
+                self.metrics.observe("capture", captured_at - read_start)
+            self.frames.put(Frame(self.captured, captured_at, image))
+            self.captured += 1
+
+    def stop(self):
+        self._stop_event.set()
+
+class InferenceWorker(threading.Thread):
+    """Runs process(image, captured_at) on the newest captured frame and publishes the Result."""
+
+    def __init__(self, frames, results, process):
+        super().__init__(name="inference", daemon=True)
+        self.frames = frames
+        self.results = results
+        self.process = process
+        self.processed = 0
+        self.errors = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            frame = self.frames.get(timeout=0.1)
+            if frame is None:
+                continue
+            start = time.perf_counter()
+            try:
+                output = self.process(frame.image, frame.captured_at)
+            except Exception as e:
+                self.errors += 1
+                logging.error(f"Error processing frame: {e}")
+                continue
+            self.results.put(Result(frame.index, frame.captured_at, time.perf_counter() - start, output))
+            self.processed += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.frames.close()
+
+class LivePipeline:
+    """Capture thread + inference worker joined by latest-frame-wins slots.
+
+    The Tk thread calls latest() from its after() loop and only renders what it gets;
+    stale frames are dropped at either slot rather than delaying newer ones.
+    """
+
+    def __init__(self, cap, process, metrics=None):
+        self.metrics = metrics
+        self.frames = LatestSlot()
+        self.results = LatestSlot()
+        self.capture = CaptureThread(cap, self.frames, metrics=metrics)
+        self.worker = InferenceWorker(self.frames, self.results, process)
+        self.rendered = 0
+        self.frame_age = 0.0  # Seconds from capture to render of the last shown result
+        self.mean_frame_age = 0.0
+
+    def start(self):
+        self.capture.start()
+        self.worker.start()
+        return self
+
+    def latest(self):
+        result = self.results.get_nowait()
+        if result is not None:
+            self.rendered += 1
+            self.frame_age = time.perf_counter() - result.captured_at
+            self.mean_frame_age += 0.1 * (self.frame_age - self.mean_frame_age) if self.rendered > 1 else self.frame_age
+            if self.metrics is not None:
+                self.metrics.observe("frame_age", self.frame_age)
+                self.metrics.set("frames_captured_total", self.capture.captured)
+                self.metrics.set("frames_inferred_total", self.worker.processed)
+                self.metrics.set("frames_dropped_total", self.dropped)
+        return result
+
+    @property
+    def dropped(self):
+        return self.frames.dropped + self.results.dropped
+
+    def stats(self):
+        return {
+            "captured": self.capture.captured,
+            "inferred": self.worker.processed,
+            "rendered": self.rendered,
+            "dropped": self.dropped,
+            "frame_age_ms": self.frame_age * 1000,
+            "mean_frame_age_ms": self.mean_frame_age * 1000,
+        }
+
+    def stop(self):
+        self.capture.stop()
+        self.worker.stop()
+        self.capture.join(timeout=1.0)
+        self.worker.join(timeout=1.0)
@@ -0,0 +1,93 @@
+# core/thumbnails.py (Reduced-scale decoding and persistent thumbnail atlas)
+import mmap
+import os
+import sqlite3
+from PIL import Image
+
+def decode_reduced(img_path, size):
+    """Decode an image straight to roughly `size`, then resize to exactly `size`.
+
+    For JPEGs, PIL's draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale,
+    which skips most of the full-resolution IDCT work.
+    """
+    img = Image.open(img_path)
+    img.draft("RGB", size)
+    img = img.convert("RGB")
+    return img.resize(size, Image.LANCZOS)
+
+class ThumbnailStore:
+    """Fixed-size RGB thumbnails packed into one memory-mapped atlas file.
+
+    Each thumbnail takes one slot of width * height * 3 bytes in `atlas.bin`; an SQLite
+    index maps source path to slot and records the source mtime and size so edited files
+    are regenerated. Reopening the gallery then reads thumbnails straight from the map.
+    """
+
+    def __init__(self, folder, size=(250, 250)):
+        self.size = tuple(size)
+        self.slot_bytes = self.size[0] * self.size[1] * 3
+        os.makedirs(folder, exist_ok=True)
+        self.index = sqlite3.connect(os.path.join(folder, "index.sqlite"))
+        self.index.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.index.execute(
+            "CREATE TABLE IF NOT EXISTS thumbs (path TEXT PRIMARY KEY, mtime_ns INTEGER, file_size INTEGER, slot INTEGER)"
+        )
+        atlas_path = os.path.join(folder, "atlas.bin")
+        size_key = f"{self.size[0]}x{self.size[1]}"
+        row = self.index.execute("SELECT value FROM meta WHERE key = 'size'").fetchone()
+        if row is None or row[0] != size_key:
+            # Slot layout depends on the thumbnail size, so a different size starts a fresh atlas
+            self.index.execute("DELETE FROM thumbs")
+            self.index.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('size', ?)", (size_key,))
+            open(atlas_path, "wb").close()
+        self.index.commit()
+        self.atlas = open(atlas_path, "a+b")
+        self.slots = os.path.getsize(atlas_path) // self.slot_bytes
+        self.map = None
+        self.hits = 0
+        self.misses = 0
+
+    def _mapped(self, slot):
+        end = (slot + 1) * self.slot_bytes
+        if self.map is None or len(self.map) < end:
+            if self.map is not None:
+                self.map.close()
+            self.atlas.flush()
+            self.map = mmap.mmap(self.atlas.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.map[slot * self.slot_bytes:end]
+
+    def get(self, img_path, size=None):
+        if size is not None and tuple(size) != self.size:
+            return decode_reduced(img_path, tuple(size))
+        stat = os.stat(img_path)
+        row = self.index.execute("SELECT mtime_ns, file_size, slot FROM thumbs WHERE path = ?", (img_path,)).fetchone()
+        if row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            self.hits += 1
+            return Image.frombytes("RGB", self.size, self._mapped(row[2]))
+
+        self.misses += 1
+        thumbnail = decode_reduced(img_path, self.size)
+        slot = row[2] if row is not None else self.slots
+        self._write_slot(slot, thumbnail.tobytes())
+        self.index.execute("INSERT OR REPLACE INTO thumbs (path, mtime_ns, file_size, slot) VALUES (?, ?, ?, ?)",
+                           (img_path, stat.st_mtime_ns, stat.st_size, slot))
+        self.index.commit()
+        return thumbnail
+
+    def _write_slot(self, slot, data):
+        if slot == self.slots:
+            self.atlas.seek(0, os.SEEK_END)
+            self.atlas.write(data)
+            self.slots += 1
+        else:
+            # "a+b" always appends, so rewrite an existing slot through a second handle
+            self.atlas.flush()
+            with open(self.atlas.name, "r+b") as f:
+                f.seek(slot * self.slot_bytes)
+                f.write(data)
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.atlas.close()
+        self.index.close()
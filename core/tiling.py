@@ -0,0 +1,60 @@
+# core/tiling.py (Overlapping tiles and cross-tile detection merging)
+import numpy as np
+
+def tile_origins(length, tile_size, overlap):
+    """Start offsets of tiles of tile_size covering [0, length) with at least `overlap` pixels shared."""
+    if length <= tile_size:
+        return [0]
+    stride = max(tile_size - overlap, 1)
+    origins = list(range(0, length - tile_size, stride))
+    origins.append(length - tile_size)  # Last tile flush with the edge instead of padding
+    return origins
+
+def make_tiles(image, tile_size, overlap):
+    """Return [(x0, y0, view)] for overlapping tiles; views share memory with `image`."""
+    height, width = image.shape[:2]
+    return [(x0, y0, image[y0:y0 + tile_size, x0:x0 + tile_size])
+            for y0 in tile_origins(height, tile_size, overlap)
+            for x0 in tile_origins(width, tile_size, overlap)]
+
+def box_iou(box, boxes):
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return inter / np.maximum(area + areas - inter, 1e-9)
+
+def nms(boxes, scores, class_ids, iou_threshold):
+    """Class-aware NMS; returns kept indices in descending score order.
+
+    Boxes of different classes are shifted apart by a per-class offset so one pass
+    handles every class, and each step suppresses all overlaps with a vector op.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=int)
+    offsets = class_ids.astype(np.float32)[:, None] * (float(boxes.max()) + 1.0)
+    shifted = boxes + offsets
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        if order.size == 1:
+            break
+        rest = order[1:]
+        order = rest[box_iou(shifted[best], shifted[rest]) <= iou_threshold]
+    return np.asarray(keep, dtype=int)
+
+def merge_tile_detections(tile_detections, origins, iou_threshold):
+    """Shift per-tile (boxes, class_ids, confidences) into image coordinates and NMS them together."""
+    if not tile_detections:
+        return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=int), np.empty(0, dtype=np.float32)
+    offsets = [np.array([x0, y0, x0, y0], dtype=np.float32) for x0, y0 in origins]
+    boxes = np.concatenate([b.reshape(-1, 4) + o for (b, _, _), o in zip(tile_detections, offsets)]).astype(np.float32)
+    class_ids = np.concatenate([c for _, c, _ in tile_detections]).astype(int)
+    confidences = np.concatenate([s for _, _, s in tile_detections]).astype(np.float32)
+    keep = nms(boxes, confidences, class_ids, iou_threshold)
+    return boxes[keep], class_ids[keep], confidences[keep]
@@ -0,0 +1,193 @@
+# core/tracking.py (Defect tracks, fabric pieces and region-of-interest inference)
+import cv2
+import numpy as np
+from core.detections import Detections
+from core.tiling import merge_tile_detections
+
+def iou_matrix(a, b):
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes as an (N, M) array."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+class DefectTracker:
+    """Gives each defect a stable id across frames by IoU, falling back to centroid distance.
+
+    Track state lives in parallel arrays. Matching is greedy on the best IoU (or, for boxes
+    left over, the nearest centroid within max_distance pixels) between same-class pairs;
+    tracks unmatched for more than max_missed updates are dropped.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_distance=50.0, max_missed=10):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.next_id = 1
+        self.reset()
+
+    def reset(self):
+        self.ids = np.empty(0, dtype=int)
+        self.boxes = np.empty((0, 4), dtype=np.float32)
+        self.class_ids = np.empty(0, dtype=int)
+        self.hits = np.empty(0, dtype=int)
+        self.missed = np.empty(0, dtype=int)
+        self.conf_sum = np.empty(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _greedy(score, valid):
+        # Pairs (track, detection) in descending score order, each used once
+        pairs = []
+        score = np.where(valid, score, -np.inf)
+        while score.size and np.isfinite(score.max()):
+            t, d = np.unravel_index(int(np.argmax(score)), score.shape)
+            pairs.append((t, d))
+            score[t, :] = -np.inf
+            score[:, d] = -np.inf
+        return pairs
+
+    def update(self, detections):
+        """Match detections to tracks; returns the track id of every detection."""
+        same_class = self.class_ids[:, None] == detections.class_ids[None, :]
+        ious = iou_matrix(self.boxes, detections.boxes)
+        pairs = self._greedy(ious.copy(), same_class & (ious >= self.iou_threshold))
+
+        matched_tracks = {t for t, _ in pairs}
+        matched_dets = {d for _, d in pairs}
+        free_tracks = np.array([t for t in range(len(self.ids)) if t not in matched_tracks], dtype=int)
+        free_dets = np.array([d for d in range(len(detections)) if d not in matched_dets], dtype=int)
+        if free_tracks.size and free_dets.size:
+            centers_t = (self.boxes[free_tracks, :2] + self.boxes[free_tracks, 2:]) / 2
+            centers_d = (detections.boxes[free_dets, :2] + detections.boxes[free_dets, 2:]) / 2
+            distance = np.linalg.norm(centers_t[:, None] - centers_d[None, :], axis=-1)
+            valid = same_class[np.ix_(free_tracks, free_dets)] & (distance <= self.max_distance)
+            pairs += [(free_tracks[t], free_dets[d]) for t, d in self._greedy(-distance, valid)]
+
+        assigned = np.zeros(len(detections), dtype=int)
+        self.missed += 1
+        for t, d in pairs:
+            self.boxes[t] = detections.boxes[d]
+            self.hits[t] += 1
+            self.missed[t] = 0
+            self.conf_sum[t] += detections.confidences[d]
+            assigned[d] = self.ids[t]
+
+        new = np.array([d for d in range(len(detections)) if not assigned[d]], dtype=int)
+        if new.size:
+            new_ids = np.arange(self.next_id, self.next_id + new.size)
+            self.next_id += new.size
+            assigned[new] = new_ids
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, detections.boxes[new]])
+            self.class_ids = np.concatenate([self.class_ids, detections.class_ids[new]])
+            self.hits = np.concatenate([self.hits, np.ones(new.size, dtype=int)])
+            self.missed = np.concatenate([self.missed, np.zeros(new.size, dtype=int)])
+            self.conf_sum = np.concatenate([self.conf_sum, detections.confidences[new]])
+
+        keep = self.missed <= self.max_missed
+        if not keep.all():
+            self.ids, self.boxes, self.class_ids = self.ids[keep], self.boxes[keep], self.class_ids[keep]
+            self.hits, self.missed, self.conf_sum = self.hits[keep], self.missed[keep], self.conf_sum[keep]
+        return assigned.tolist()
+
+    @property
+    def mean_confidence(self):
+        return self.conf_sum / np.maximum(self.hits, 1)
+
+    def confirmed(self, min_hits, min_conf):
+        """Mask of tracks seen on at least min_hits frames with mean confidence >= min_conf."""
+        return (self.hits >= min_hits) & (self.mean_confidence >= min_conf)
+
+def roi_windows(boxes, frame_shape, margin, min_size):
+    """Integer crop windows (x0, y0, x1, y1) around boxes, padded by margin and clipped to the frame."""
+    height, width = frame_shape[:2]
+    windows = []
+    for x1, y1, x2, y2 in boxes.tolist():
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        half_w = max((x2 - x1) / 2 + margin, min_size / 2)
+        half_h = max((y2 - y1) / 2 + margin, min_size / 2)
+        x0, y0 = int(max(cx - half_w, 0)), int(max(cy - half_h, 0))
+        windows.append((x0, y0, int(min(cx + half_w, width)), int(min(cy + half_h, height))))
+    return windows
+
+def detect_rois(detect_many, frame, boxes, margin, min_size, iou_threshold=0.5):
+    """Run detect_many(crops) -> [Detections] on windows around boxes and merge into frame coordinates."""
+    windows = roi_windows(boxes, frame.shape, margin, min_size)
+    if not windows:
+        return Detections.empty()
+    found = detect_many([frame[y0:y1, x0:x1] for x0, y0, x1, y1 in windows])
+    return Detections(*merge_tile_detections([tuple(d) for d in found], [w[:2] for w in windows], iou_threshold))
+
+class PieceTracker:
+    """Splits the stream into fabric pieces and makes one defective/good call per piece.
+
+    A piece is a settled scene: after a large change (mean abs. difference of a small
+    grayscale thumbnail above change_threshold) the scene must hold still for settle_frames
+    before it counts as a new piece. decide() reports "defective" as soon as a defect track
+    is confirmed, or "good" once decide_frames inferences of the settled piece (reported
+    through inferred()) have passed without one; either way only once per piece. Counting
+    inferences rather than frames keeps a gate that skips inference on a still scene from
+    turning a defective piece "good" before its defect could be seen often enough.
+    """
+
+    def __init__(self, change_threshold=20.0, settle_frames=5, decide_frames=30, size=(64, 48)):
+        self.change_threshold = change_threshold
+        self.settle_frames = settle_frames
+        self.decide_frames = decide_frames
+        self.size = size
+        self.piece_id = 0
+        self.reference = None  # Thumbnail of the current settled piece
+        self.previous = None
+        self.still = 0
+        self.frames_inferred = 0
+        self.decision = None
+
+    def _signature(self, frame):
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return (cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small).astype(np.int16)
+
+    def observe(self, frame):
+        """Feed one frame; returns True when a new piece has just settled in view."""
+        signature = self._signature(frame)
+        moving = self.previous is not None and float(np.abs(signature - self.previous).mean()) > self.change_threshold / 4
+        self.previous = signature
+        self.still = 0 if moving else self.still + 1
+        if self.still < self.settle_frames:
+            return False
+        if self.reference is None or float(np.abs(signature - self.reference).mean()) > self.change_threshold:
+            self.reference = signature
+            self.piece_id += 1
+            self.frames_inferred = 0
+            self.decision = None
+            return True
+        return False
+
+    def inferred(self):
+        """Count one inference of the current frame towards the piece's decision."""
+        if self.settled:
+            self.frames_inferred += 1
+
+    @property
+    def settled(self):
+        return self.reference is not None and self.still >= self.settle_frames
+
+    @property
+    def undecided(self):
+        return self.settled and self.decision is None
+
+    def decide(self, tracker, min_hits, min_conf):
+        """Return "defective" / "good" the first time the current piece can be called, else None."""
+        if self.decision is not None or not self.settled:
+            return None
+        if tracker.confirmed(min_hits, min_conf).any():
+            self.decision = "defective"
+        elif self.frames_inferred >= self.decide_frames:
+            self.decision = "good"
+        return self.decision
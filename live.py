@@ -1,11 +1,18 @@
 import os
 import logging
-import torch
+import time
+import types
 import cv2
-from ultralytics import YOLO
-from PIL import Image, ImageTk
 import tkinter as tk
 from tkinter import ttk
+from core.lazy import LazyModel
+from core.streaming import LivePipeline
+from core.multistream import MultiStreamPipeline
+from core.recording import SessionRecorder, ReplayCapture
+from core.scheduler import FrameScheduler
+from core.display import TkDisplay
+from core.detections import Detections
+from core.metrics import METRICS
 
 # Configure Logger
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -15,37 +22,86 @@ class Settings:
     VERSION = "1.0.0"
     MODEL_PATH = "C:/Users/spgir/OneDrive/Documents/BE Project/codebase/model_training/models/runs/train/weights/best.pt"
     CLASS_NAMES = ['Hole', 'Stitch', 'Seam']
-    DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    DEVICE = None  # None = "cuda" when available, else "cpu"; resolved when the model loads
+    INFERENCE_BACKEND = "torch"  # "torch", "onnx" or "onnx-int8" (ONNX files made by `python -m core.export`)
     CAMERA_SOURCES = {'LAPTOP': 0, 'IP_CAMERA': "http://192.168.195.198:4747/video"}
     DEFAULT_CAMERA = 'LAPTOP'
-    FRAME_RATE = 10
+    MULTI_CAMERA = False  # Inspect every CAMERA_SOURCES stream at once, one batched model call per tick (core/multistream.py)
+    STREAM_DISPLAY_SIZE = (480, 360)  # Per-camera view size when MULTI_CAMERA is on
+    FRAME_RATE = 10  # Target display/inference FPS
+    LATENCY_BUDGET = 0.25  # Seconds from capture to render; results older than this count as budget misses
+    INPUT_SIZES = (640, 512, 416, 320)  # Model input sizes the scheduler may step down through to hold FRAME_RATE
     WINDOW_SIZE = "1280x720"
+    METRICS_PORT = 9108  # Prometheus text endpoint on http://127.0.0.1:<port>/metrics (None to disable)
+    METRICS_FILE = None  # Optional path to dump the final metrics to on exit
+    RECORD_DIR = None  # Record inferred frames + detections here for offline replay (see core/recording.py)
+    REPLAY_DIR = None  # Play a recorded session instead of opening a camera
+    REPLAY_REALTIME = True  # Pace replay to the recorded timestamps (False = as fast as frames decode)
 
     @staticmethod
     def check_cuda():
-        logging.info(f"Using device: {Settings.DEVICE}")
+        import torch
+        logging.info(f"Using device: {Settings.DEVICE or 'auto'}")
         if torch.cuda.is_available():
             logging.info(f"CUDA available: {torch.cuda.get_device_name(0)}")
         else:
             logging.warning("CUDA not available. Using CPU.")
 
-Settings.check_cuda()
-
-# Load YOLO model
+# Load YOLO model (torch/ultralytics are imported on first use, not at startup)
 class LiveFabricDefectDetector:
+    _shared = None
+
     def __init__(self):
-        self.model = YOLO(Settings.MODEL_PATH)
+        if LiveFabricDefectDetector._shared is None:
+            LiveFabricDefectDetector._shared = LazyModel(Settings.MODEL_PATH, Settings.DEVICE, Settings.INFERENCE_BACKEND)
+        self.lazy_model = LiveFabricDefectDetector._shared
         self.class_names = Settings.CLASS_NAMES
 
-    def predict(self, frame):
-        results = self.model.predict(source=frame, save=False, show=False)
+    @property
+    def ready(self):
+        return self.lazy_model.loaded
+
+    def load_async(self, on_done=None):
+        def loaded(error):
+            if error is None:
+                Settings.check_cuda()
+            if on_done is not None:
+                on_done(error)
+        return self.lazy_model.load_async(loaded)
+
+    @property
+    def model(self):
+        return self.lazy_model.get()
+
+    def predict(self, frame, imgsz=None):
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        results = self.model.predict(source=frame, save=False, show=False, device=self.lazy_model.device, **kwargs)
         return results[0]
 
+    def detect(self, frame, imgsz=None):
+        return Detections.from_result(self.predict(frame, imgsz))
+
+    def detect_many(self, images, imgsz=None):
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        results = self.model.predict(source=images, save=False, show=False, device=self.lazy_model.device, **kwargs)
+        return [Detections.from_result(result) for result in results]
+
 # UI Class
 class LiveFabricDetectionApp:
     def __init__(self):
         self.detector = LiveFabricDefectDetector()
-        self.cap = cv2.VideoCapture(Settings.CAMERA_SOURCES[Settings.DEFAULT_CAMERA])
+        # With MULTI_CAMERA every source gets its own capture thread inside MultiStreamPipeline
+        self.streams = list(Settings.CAMERA_SOURCES) if Settings.MULTI_CAMERA else None
+        if self.streams:
+            self.cap = None
+            if Settings.RECORD_DIR or Settings.REPLAY_DIR:
+                logging.warning("Recording and replay cover a single camera; ignored with MULTI_CAMERA")
+        elif Settings.REPLAY_DIR:
+            self.cap = ReplayCapture(Settings.REPLAY_DIR, realtime=Settings.REPLAY_REALTIME)
+        else:
+            self.cap = cv2.VideoCapture(Settings.CAMERA_SOURCES[Settings.DEFAULT_CAMERA])
+        self.recorder = SessionRecorder(Settings.RECORD_DIR) if Settings.RECORD_DIR and not self.streams else None
+        self.scheduler = FrameScheduler(Settings.FRAME_RATE, Settings.LATENCY_BUDGET, Settings.INPUT_SIZES, metrics=METRICS)
 
         # --- Initialize Tkinter Root ---
         self.root = tk.Tk()
@@ -62,9 +118,20 @@ class LiveFabricDetectionApp:
         self.content_frame = tk.Frame(self.root, bg="white")
         self.content_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        # --- Camera Frame ---
-        self.camera_label = tk.Label(self.content_frame, bg="black")
-        self.camera_label.grid(row=0, column=0, padx=10)
+        # --- Camera Frame (one view per camera, two to a row, with MULTI_CAMERA) ---
+        if self.streams:
+            self.camera_frame = tk.Frame(self.content_frame, bg="white")
+            self.camera_frame.grid(row=0, column=0, padx=10)
+            self.displays = {}
+            for i, name in enumerate(self.streams):
+                label = tk.Label(self.camera_frame, bg="black")
+                label.grid(row=i // 2, column=i % 2, padx=2, pady=2)
+                self.displays[name] = TkDisplay(label, Settings.STREAM_DISPLAY_SIZE)
+            self.stream_status = {}
+        else:
+            self.camera_label = tk.Label(self.content_frame, bg="black")
+            self.camera_label.grid(row=0, column=0, padx=10)
+            self.display = TkDisplay(self.camera_label, (640, 480))
 
         # --- Classification Info Frame ---
         self.info_frame = tk.Frame(self.content_frame, bg="white")
@@ -77,44 +144,148 @@ class LiveFabricDetectionApp:
         self.status_bar = tk.Label(self.root, text=f"Version: {Settings.VERSION}", bd=1, relief=tk.SUNKEN, anchor=tk.E, bg="#d9d9d9")
         self.status_bar.pack(side="bottom", fill="x")
 
+        # Model loads in the background; frames are shown unannotated until it is ready.
+        # Capture and inference run on their own threads; the Tk loop only renders results.
+        self.detector.load_async()
+        if self.streams:
+            sources = {name: Settings.CAMERA_SOURCES[name] for name in self.streams}
+            self.pipeline = MultiStreamPipeline(sources, self.process_batch).start()
+        else:
+            self.pipeline = LivePipeline(self.cap, self.process_frame, METRICS).start()
+        if Settings.METRICS_PORT:
+            try:
+                METRICS.serve(Settings.METRICS_PORT)
+                logging.info(f"Metrics at http://127.0.0.1:{Settings.METRICS_PORT}/metrics")
+            except OSError as e:
+                logging.warning(f"Metrics endpoint unavailable on port {Settings.METRICS_PORT}: {e}")
         self.update_frame()
 
-    def update_frame(self):
-        ret, frame = self.cap.read()
-        if ret:
-            detections = self.detector.predict(frame)
+    def process_frame(self, frame, captured_at=None):
+        """Runs on the inference thread: returns (frame, labels, detections), labels None while loading.
 
-            for box in detections.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                class_id = int(box.cls)
-                label = f"{Settings.CLASS_NAMES[class_id]} ({box.conf[0]:.2f})"
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+        Boxes are drawn by the display at its resolution, not onto the camera frame.
+        """
+        if not self.detector.ready:
+            if self.recorder is not None:
+                self.recorder.write(frame, captured_at=captured_at)
+            return frame, None, None
 
-            # Convert OpenCV frame (BGR to RGB)
-            img = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            img = img.resize((640, 480))  # Resize for better UI fit
-            img_tk = ImageTk.PhotoImage(image=img)
+        imgsz = self.scheduler.imgsz
+        start = time.perf_counter()
+        with METRICS.time("inference"):
+            detections = self.detector.detect(frame, imgsz)
+        self.scheduler.record_inference(time.perf_counter() - start)
+        if self.recorder is not None:
+            self.recorder.write(frame, detections, captured_at, imgsz)
+        with METRICS.time("postprocess"):
+            labels = detections.labels(Settings.CLASS_NAMES)
+        return frame, labels, detections
 
-            self.camera_label.config(image=img_tk)
-            self.camera_label.image = img_tk
+    def process_batch(self, frames):
+        """Runs on the batching thread: one model call for the newest frame of every camera.
+
+        Returns (labels, detections) per frame, (None, None) while the model loads.
+        """
+        if not self.detector.ready:
+            return [(None, None)] * len(frames)
+
+        start = time.perf_counter()
+        with METRICS.time("inference"):
+            found = self.detector.detect_many(frames, self.scheduler.imgsz)
+        self.scheduler.record_inference(time.perf_counter() - start)
+        with METRICS.time("postprocess"):
+            return [(detections.labels(Settings.CLASS_NAMES), detections) for detections in found]
+
+    def update_streams(self):
+        """Multi-camera render: the newest result of each camera, with its FPS and latency"""
+        for name in self.streams:
+            result = self.pipeline.latest(name)
+            if result is None:
+                continue
+            frame, (detected_labels, detections) = result.output
+            self.displays[name].show(frame, detections, Settings.CLASS_NAMES, "{name} ({conf:.2f})")
+            if detected_labels is None:
+                error = self.detector.lazy_model.error
+                self.stream_status[name] = f"Failed to load model: {error}" if error else "Loading model..."
+            elif detected_labels:
+                self.stream_status[name] = "Detected Defects: " + ", ".join(sorted(set(detected_labels)))
+            else:
+                self.stream_status[name] = "No Defects Detected"
+
+        summary = self.pipeline.summary()
+        lines = [f"{name}: {summary[name]['fps']:.1f} FPS, {summary[name]['latency_ms']:.0f} ms\n"
+                 f"{self.stream_status.get(name, 'Waiting for frames...')}" for name in self.streams]
+        defective = any(status.startswith("Detected") for status in self.stream_status.values())
+        self.class_label.config(text="\n\n".join(lines), fg="red" if defective else "black")
+        batches = summary["_batches"]
+        self.status_bar.config(
+            text=f"Cameras {len(self.streams)} | Batch size {batches['mean_size']} | Batch errors {batches['errors']} | "
+                 f"Input {self.scheduler.imgsz} | Version: {Settings.VERSION}"
+        )
+        self.root.after(self.scheduler.next_delay_ms(), self.update_streams)
+
+    def update_frame(self):
+        if self.streams:
+            return self.update_streams()
+        result = self.pipeline.latest()
+        if result is not None:
+            frame, detected_labels, detections = result.output
+            render_start = time.perf_counter()
+            self.scheduler.record_result(self.pipeline.frame_age)
+
+            # Resize, annotate and convert into reused buffers; the label's photo is updated in place
+            self.display.show(frame, detections, Settings.CLASS_NAMES, "{name} ({conf:.2f})")
 
             # Update classification info
-            detected_labels = [Settings.CLASS_NAMES[int(box.cls)] for box in detections.boxes]
-            if detected_labels:
+            if detected_labels is None:
+                error = self.detector.lazy_model.error
+                self.class_label.config(text=f"Failed to load model: {error}" if error else "Loading model...",
+                                        fg="red" if error else "black")
+            elif detected_labels:
                 text = "Detected Defects:\n" + "\n".join(set(detected_labels))
                 self.class_label.config(text=text, fg="red")
             else:
                 self.class_label.config(text="No Defects Detected", fg="green")
 
-        self.root.after(Settings.FRAME_RATE, self.update_frame)
+            METRICS.observe("render", time.perf_counter() - render_start)
+            stats = self.pipeline.stats()
+            self.status_bar.config(
+                text=f"FPS {METRICS.rate('render'):.1f} | p95 inference {METRICS.p95('inference') * 1000:.0f} ms | "
+                     f"p95 frame age {METRICS.p95('frame_age') * 1000:.0f} ms | Budget misses: {self.scheduler.miss_ratio:.0%} | "
+                     f"Input {self.scheduler.imgsz} | Dropped: {stats['dropped']} | Version: {Settings.VERSION}"
+            )
+
+        self.root.after(self.scheduler.next_delay_ms(), self.update_frame)
 
     def run(self):
         logging.info("Starting Fabric Defect Detection...")
         self.root.mainloop()
-        self.cap.release()
+        self.pipeline.stop()
+        stats = self.pipeline.summary() if self.streams else self.pipeline.stats()
+        logging.info(f"Pipeline stats: {stats}, scheduler: {self.scheduler.stats()}")
+        if self.recorder is not None:
+            self.recorder.close()
+        if Settings.METRICS_FILE:
+            METRICS.dump(Settings.METRICS_FILE)
+        METRICS.close()
+        if self.cap is not None:
+            self.cap.release()
         cv2.destroyAllWindows()
 
+def headless_app(scheduler=None):
+    """The app's inference state without a window or camera, for replays and benchmarks.
+
+    process_frame(frame) runs LiveFabricDetectionApp.process_frame; the model is loaded first.
+    """
+    app = types.SimpleNamespace(
+        detector=LiveFabricDefectDetector(),
+        recorder=None,
+        scheduler=scheduler or FrameScheduler(Settings.FRAME_RATE, Settings.LATENCY_BUDGET, Settings.INPUT_SIZES),
+    )
+    app.process_frame = lambda frame, captured_at=None: LiveFabricDetectionApp.process_frame(app, frame, captured_at)
+    app.detector.model  # Load now so the first frame is not charged for it
+    return app
+
 if __name__ == "__main__":
     app = LiveFabricDetectionApp()
     app.run()
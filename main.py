@@ -1,5 +1,67 @@
 # main.py (Entry point)
-from ui.app import run_app
+import argparse
+import os
+import sys
+
+def parse_args(argv=None):
+    from config import settings
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Fabric defect detection on static images")
+    parser.add_argument("--image-dir", help="Directory of fabric images to process headless")
+    parser.add_argument("--output-dir", default=settings.DETECTED_FOLDER, help="Where annotated images are saved")
+    parser.add_argument("--conf-threshold", type=float, default=settings.CONF_THRESHOLD)
+    parser.add_argument("--model-path", default=settings.MODEL_PATH)
+    parser.add_argument("--batch-size", type=int, default=settings.BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=cpus, help="Worker processes (default: one per core)")
+    parser.add_argument("--threads", type=int, default=None, help="Torch threads per worker (default: cores / workers)")
+    parser.add_argument("--summary", default=None, help="JSON summary path (default: <output-dir>/summary.json)")
+    parser.add_argument("--gui", action="store_true", help="Open the gallery instead of running headless")
+    parser.add_argument("--class", dest="obj_class", help="Gallery: show stored detections of this class")
+    parser.add_argument("--min-conf", type=float, help="Gallery: show stored detections at or above this confidence")
+    parser.add_argument("--run", help="Gallery: show stored detections from this run id, or 'latest'")
+    parser.add_argument("--limit", type=int, default=500, help="Gallery: page size for stored detections")
+    parser.add_argument("--offset", type=int, default=0, help="Gallery: page offset for stored detections")
+    parser.add_argument("--no-display", action="store_true", help="Accepted for compatibility; headless is the default with --image-dir")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    from config import settings
+    overrides = {
+        "MODEL_PATH": args.model_path,
+        "DETECTED_FOLDER": args.output_dir,
+        "CONF_THRESHOLD": args.conf_threshold,
+        "BATCH_SIZE": args.batch_size,
+    }
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+
+    if args.gui or not args.image_dir:
+        if args.image_dir:
+            settings.IMAGE_FOLDER = args.image_dir
+        query = None
+        if args.obj_class or args.min_conf is not None or args.run:
+            run_id = args.run if args.run in (None, "latest") else int(args.run)
+            query = {"obj_class": args.obj_class, "min_conf": args.min_conf, "run_id": run_id,
+                     "limit": args.limit, "offset": args.offset}
+        from ui.app import run_app
+        run_app(query)
+        return 0
+
+    from core.batch import run_batch
+    from core.model import list_images, start_results_run
+    img_paths = list_images(args.image_dir)
+    if not img_paths:
+        print(f"No images found in {args.image_dir}")
+        return 1
+    workers = max(1, min(args.workers, len(img_paths)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    summary_path = args.summary or os.path.join(args.output_dir, "summary.json")
+    run_id = start_results_run(os.path.abspath(args.image_dir))
+    summary = run_batch(img_paths, overrides, workers, threads, summary_path, run_id)
+    print(f"{summary['images']} images, {summary['detections']} detections in {summary['elapsed_s']} s "
+          f"({summary['images_per_s']} img/s, {workers} workers x {threads} threads). Summary: {summary_path}")
+    return 0
 
 if __name__ == "__main__":
-    run_app()
+    sys.exit(main())
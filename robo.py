@@ -1,15 +1,25 @@
 import os
 import logging
-import torch
 import cv2
 import time
 import threading
+import queue
 import serial
 import json
-from ultralytics import YOLO
-from PIL import Image, ImageTk
+import types
+from collections import deque
+from concurrent.futures import Future
 import tkinter as tk
 from tkinter import ttk, messagebox
+from core.lazy import LazyModel
+from core.streaming import LivePipeline
+from core.recording import SessionRecorder, ReplayCapture
+from core.scheduler import FrameScheduler
+from core.gate import ChangeGate
+from core.tracking import DefectTracker, PieceTracker, detect_rois
+from core.display import TkDisplay
+from core.detections import Detections
+from core.metrics import METRICS
 
 # Configure Logger
 logging.basicConfig(
@@ -26,11 +36,20 @@ class Settings:
     VERSION = "2.0.0"
     MODEL_PATH = "C:/Users/spgir/OneDrive/Documents/BE Project/codebase/model_training/models/runs/train/weights/best.pt"  # Update this path to where your model is stored
     CLASS_NAMES = ['Hole', 'Stitch', 'Seam']
-    DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    DEVICE = None  # None = "cuda" when available, else "cpu"; resolved when the model loads
+    INFERENCE_BACKEND = "torch"  # "torch", "onnx" or "onnx-int8" (ONNX files made by `python -m core.export`)
     CAMERA_SOURCES = {'LAPTOP': 0, 'IP_CAMERA': "http://192.168.195.198:4747/video"}
     DEFAULT_CAMERA = 'LAPTOP'
-    FRAME_RATE = 10
+    FRAME_RATE = 10  # Target display/inference FPS
+    LATENCY_BUDGET = 0.25  # Seconds from capture to render; results older than this count as budget misses
+    INPUT_SIZES = (640, 512, 416, 320)  # Model input sizes the scheduler may step down through to hold FRAME_RATE
     WINDOW_SIZE = "1280x720"
+    METRICS_PORT = 9108  # Prometheus text endpoint on http://127.0.0.1:<port>/metrics (None to disable)
+    METRICS_FILE = None  # Optional path to dump the final metrics to on exit
+    RECORD_DIR = None  # Record inferred frames + detections here for offline replay (see core/recording.py)
+    REPLAY_DIR = None  # Play a recorded session instead of opening a camera
+    REPLAY_REALTIME = True  # Pace replay to the recorded timestamps (False = as fast as frames decode)
+    CAMERA_FAILURE_LIMIT = 20  # Consecutive failed reads (~50 ms apart) before reporting a camera error
     
     # Arduino settings
     ARDUINO_PORT = "COM3"  # Change this to match your Arduino port (e.g., "/dev/ttyACM0" on Linux)
@@ -40,55 +59,125 @@ class Settings:
     GRIPPER_CHANNEL = 3
     DETECTION_THRESHOLD = 0.6  # Confidence threshold for defect detection
     DETECTION_COOLDOWN = 5  # Seconds between robot actions to avoid rapid movements
+    ARDUINO_ACK_TIMEOUT = 3.0  # Seconds to wait for the firmware to acknowledge a command
+    ARDUINO_PIPELINE_DEPTH = 1  # Commands sent ahead of their acks (raise only if the firmware buffers commands)
+    COMMAND_SETTLE_TIME = 0.0  # Extra pause after each ack, for firmware that acks before servos finish
+
+    # Change-detection gate: reuse the previous detections while the scene is static
+    CHANGE_THRESHOLD = 4.0  # Mean abs. grayscale difference (0-255) that counts as a new scene
+    FORCE_REFRESH_FRAMES = 30  # Run inference at least this often even on a static scene
+
+    # Tracking: one defective/good decision per fabric piece, crop-only inference between refreshes
+    TRACK_IOU = 0.3  # Min IoU to continue a defect track (nearest centroid within TRACK_MAX_DISTANCE otherwise)
+    TRACK_MAX_DISTANCE = 50  # Pixels
+    TRACK_MAX_MISSED = 10  # Inferred frames a track may go unseen before it is dropped
+    TRACK_MIN_HITS = 3  # Frames a defect must be seen on (at DETECTION_THRESHOLD mean confidence) to reject a piece
+    ROI_REFRESH_FRAMES = 10  # Full-frame inference at least every this many inferred frames
+    ROI_MARGIN = 48  # Pixels of context around each tracked defect
+    ROI_MIN_SIZE = 128  # Smallest crop edge sent to the model
+    ROI_IMGSZ = 320  # Model input size for crops
+    PIECE_CHANGE_THRESHOLD = 20.0  # Mean abs. grayscale difference (0-255) between settled scenes that means a new piece
+    PIECE_SETTLE_FRAMES = 5  # Still frames before a new piece counts as in place
+    PIECE_DECIDE_FRAMES = 30  # Inferences of a settled piece without a confirmed defect before it is called good
+    ROUTE_GOOD_PIECES = False  # Auto mode also moves good pieces (to the good bin), not only defective ones
 
     @staticmethod
     def check_cuda():
-        logging.info(f"Using device: {Settings.DEVICE}")
+        import torch
+        logging.info(f"Using device: {Settings.DEVICE or 'auto'}")
         if torch.cuda.is_available():
             logging.info(f"CUDA available: {torch.cuda.get_device_name(0)}")
         else:
             logging.warning("CUDA not available. Using CPU.")
 
-Settings.check_cuda()
-
-# Load YOLO model
+# Load YOLO model (torch/ultralytics are imported on first use, not at startup)
 class LiveFabricDefectDetector:
+    _shared = None
+
     def __init__(self):
-        try:
-            self.model = YOLO(Settings.MODEL_PATH)
-            self.class_names = Settings.CLASS_NAMES
-            logging.info("YOLO model loaded successfully")
-        except Exception as e:
-            logging.error(f"Failed to load YOLO model: {e}")
-            raise
+        if LiveFabricDefectDetector._shared is None:
+            LiveFabricDefectDetector._shared = LazyModel(Settings.MODEL_PATH, Settings.DEVICE, Settings.INFERENCE_BACKEND)
+        self.lazy_model = LiveFabricDefectDetector._shared
+        self.class_names = Settings.CLASS_NAMES
 
-    def predict(self, frame):
-        results = self.model.predict(source=frame, save=False, show=False)
+    @property
+    def ready(self):
+        return self.lazy_model.loaded
+
+    def load_async(self, on_done=None):
+        """Load the model in the background so the window can open first"""
+        def loaded(error):
+            if error is None:
+                logging.info("YOLO model loaded successfully")
+                Settings.check_cuda()
+            if on_done is not None:
+                on_done(error)
+        return self.lazy_model.load_async(loaded)
+
+    @property
+    def model(self):
+        return self.lazy_model.get()
+
+    def predict(self, frame, imgsz=None):
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        results = self.model.predict(source=frame, save=False, show=False, device=self.lazy_model.device, **kwargs)
         return results[0]
 
+    def detect(self, frame, imgsz=None):
+        """Detections for a frame as arrays (one tensor copy, no per-box conversions)"""
+        return Detections.from_result(self.predict(frame, imgsz))
+
+    def detect_many(self, images, imgsz=None):
+        """Detections for several images (e.g. crops) from one model call"""
+        kwargs = {"imgsz": imgsz} if imgsz else {}
+        results = self.model.predict(source=images, save=False, show=False, device=self.lazy_model.device, **kwargs)
+        return [Detections.from_result(result) for result in results]
+
 # Robot Arm Controller using Arduino
 class RobotArmController:
+    """Drives the arm through one serial worker thread and a command queue.
+
+    The firmware answers every JSON command with one line once it has applied it, so
+    sequences advance on those acknowledgements instead of fixed sleeps. Up to
+    Settings.ARDUINO_PIPELINE_DEPTH commands may be in flight before the worker waits
+    for the oldest ack. Round-trip latency is recorded per command type. A missing ack
+    aborts the rest of the sequence: the worker waits out the late acks of what was already
+    sent and clears the input buffer before taking new work, so later acks are never
+    credited to the wrong command.
+    """
+
     def __init__(self):
         self.arm_ready = False
+        self.arduino = None
+        self.last_action_time = 0
+        self.timeouts = 0
+        self.latencies = {}  # command name -> recent round-trip times (s)
+        self.cycle_times = deque(maxlen=100)  # seconds per pick-and-place cycle
+        self.commands = queue.Queue()
+        self._pending = 0
+        self._state_lock = threading.Lock()
+        self._worker = None
+
+        # Define arm positions (servo angles)
+        self.positions = {
+            "home":         [120, 45, 45, 180],  # Last value is gripper (closed)
+            "pickup":       [0, 0, 180, 180],
+            "defective":    [180, 0, 180, 180],
+            "non_defective":[90, 0, 180, 180]
+        }
+
         try:
             # Connect to Arduino
             self.arduino = serial.Serial(
                 port=Settings.ARDUINO_PORT,
                 baudrate=Settings.ARDUINO_BAUDRATE,
-                timeout=2.0
+                timeout=Settings.ARDUINO_ACK_TIMEOUT
             )
-            time.sleep(2)  # Wait for Arduino to initialize
-            
-            # Define arm positions (servo angles)
-            self.positions = {
-                "home":         [120, 45, 45, 180],  # Last value is gripper (closed)
-                "pickup":       [0, 0, 180, 180],
-                "defective":    [180, 0, 180, 180],
-                "non_defective":[90, 0, 180, 180]
-            }
-            
-            self.is_busy = False
-            self.last_action_time = 0
+            time.sleep(2)  # Wait for Arduino to initialize (it resets when the port opens)
+            self.arduino.reset_input_buffer()
+
+            self._worker = threading.Thread(target=self._run, name="serial-worker", daemon=True)
+            self._worker.start()
             
             # Initialize arm position
             self.move_to_position(self.positions["home"])
@@ -98,15 +187,108 @@ class RobotArmController:
         except Exception as e:
             logging.error(f"Failed to initialize robot arm: {e}")
             self.arm_ready = False
+
+    @property
+    def is_busy(self):
+        with self._state_lock:
+            return self._pending > 0
+
+    def submit(self, commands, cycle=False):
+        """Queue a sequence of command dicts; returns a Future of the list of responses"""
+        future = Future()
+        if self._worker is None:
+            future.set_exception(RuntimeError("Robot arm not connected"))
+            return future
+        with self._state_lock:
+            self._pending += 1
+        self.commands.put((commands, future, cycle))
+        return future
+
+    def _run(self):
+        while True:
+            job = self.commands.get()
+            if job is None:
+                break
+            commands, future, cycle = job
+            start = time.perf_counter()
+            responses, error = None, None
+            try:
+                responses = self._execute(commands)
+            except Exception as e:
+                logging.error(f"Error in robot movement: {e}")
+                error = e
+            elapsed = time.perf_counter() - start
+            if cycle:
+                self.cycle_times.append(elapsed)
+                logging.info(f"Robot cycle finished in {elapsed:.2f} s")
+            self.last_action_time = time.time()
+            with self._state_lock:
+                self._pending -= 1
+            # Resolve only after the arm is marked idle, so waiters see is_busy == False
+            if error is None:
+                future.set_result(responses)
+            else:
+                future.set_exception(error)
+
+    def _execute(self, commands):
+        in_flight = deque()
+        responses = []
+        try:
+            for command in commands:
+                self.arduino.write(f"{json.dumps(command)}\n".encode())
+                in_flight.append((command["cmd"], time.perf_counter()))
+                if len(in_flight) >= Settings.ARDUINO_PIPELINE_DEPTH:
+                    responses.append(self._read_ack(*in_flight[0]))
+                    in_flight.popleft()
+            while in_flight:
+                responses.append(self._read_ack(*in_flight[0]))
+                in_flight.popleft()
+        except TimeoutError:
+            self._resync(len(in_flight))
+            raise
+        return responses
+
+    def _resync(self, outstanding):
+        """Wait for acks of commands already sent (the arm may still be moving), then drop any leftovers"""
+        for _ in range(outstanding):
+            late = self.arduino.readline().decode().strip()
+            if not late:
+                logging.error("Arduino still silent after a second timeout, discarding its input")
+                break
+            logging.warning(f"Late Arduino response discarded: {late}")
+        self.arduino.reset_input_buffer()
+
+    def _read_ack(self, command_name, sent_at):
+        response = self.arduino.readline().decode().strip()
+        latency = time.perf_counter() - sent_at
+        METRICS.observe("serial", latency)
+        if not response:
+            METRICS.inc("serial_timeouts_total")
+            self.timeouts += 1
+            raise TimeoutError(f"No Arduino acknowledgement for {command_name} within {Settings.ARDUINO_ACK_TIMEOUT} s")
+        self.latencies.setdefault(command_name, deque(maxlen=200)).append(latency)
+        logging.info(f"Arduino response: {response} ({command_name}, {latency * 1000:.0f} ms)")
+        if Settings.COMMAND_SETTLE_TIME > 0:
+            time.sleep(Settings.COMMAND_SETTLE_TIME)
+        return response
+
+    def latency_stats(self):
+        """Per-command round-trip latency: {name: {"count", "mean_ms", "p95_ms"}}"""
+        stats = {}
+        for name, samples in list(self.latencies.items()):
+            ordered = sorted(samples)
+            if ordered:
+                stats[name] = {
+                    "count": len(ordered),
+                    "mean_ms": 1000 * sum(ordered) / len(ordered),
+                    "p95_ms": 1000 * ordered[min(int(0.95 * len(ordered)), len(ordered) - 1)],
+                }
+        return stats
     
     def send_command(self, command_dict):
-        """Send a command to the Arduino as JSON"""
+        """Send a command to the Arduino as JSON and wait for its acknowledgement"""
         try:
-            command_json = json.dumps(command_dict)
-            self.arduino.write(f"{command_json}\n".encode())
-            response = self.arduino.readline().decode().strip()
-            logging.info(f"Arduino response: {response}")
-            return response
+            return self.submit([command_dict]).result()[0]
         except Exception as e:
             logging.error(f"Error sending command to Arduino: {e}")
             return "ERROR"
@@ -122,82 +304,61 @@ class RobotArmController:
     
     def move_to_position(self, position_list):
         """Move all servos to a predefined position"""
-        command = {
+        return self.send_command(self.position_command(position_list))
+
+    @staticmethod
+    def position_command(position_list):
+        return {
             "cmd": "move_all",
             "angles": position_list
         }
-        return self.send_command(command)
-    
-    def gripper_open(self):
-        logging.info("Gripper Opening...")
-        command = {
+
+    @staticmethod
+    def gripper_command(angle):
+        return {
             "cmd": "move",
             "servo": Settings.GRIPPER_CHANNEL,
-            "angle": 0
+            "angle": angle
         }
-        self.send_command(command)
-        time.sleep(1.0)
+    
+    def gripper_open(self):
+        logging.info("Gripper Opening...")
+        self.send_command(self.gripper_command(0))
         
     def gripper_close(self):
         logging.info("Gripper Closing...")
-        command = {
-            "cmd": "move",
-            "servo": Settings.GRIPPER_CHANNEL,
-            "angle": 180
-        }
-        self.send_command(command)
-        time.sleep(1.0)
+        self.send_command(self.gripper_command(180))
+
+    def pick_and_place_sequence(self, defective=True):
+        """Commands for one fabric piece: pickup, then drop in the defective or good section"""
+        place = self.positions["defective" if defective else "non_defective"]
+        return [
+            self.position_command(self.positions["home"]),    # 1. Start at home with gripper closed
+            self.position_command(self.positions["pickup"]),  # 2. Move to pickup position,
+            self.gripper_command(0),                          #    open gripper,
+            self.gripper_command(180),                        #    close to grab fabric
+            self.position_command(place),                     # 3. Move to the placement section
+            self.gripper_command(0),                          # 4. Open gripper to release fabric,
+            self.gripper_command(180),                        #    then close it
+            self.position_command(self.positions["home"]),    # 5. Return to home position
+        ]
     
     def handle_object(self, defective=True):
-        self.is_busy = True
-        
-        try:
-            # 1. Start at home position with gripper closed
-            logging.info("-> At Home Position")
-            self.move_to_position(self.positions["home"])
-            time.sleep(0.5)
-            
-            # 2. Move to pickup position, open gripper, then close to grab fabric
-            logging.info("-> Moving to Pickup Position")
-            self.move_to_position(self.positions["pickup"])
-            time.sleep(0.5)
-            
-            logging.info("-> Opening gripper to prepare for pickup")
-            self.gripper_open()
-            time.sleep(0.5)
-            
-            logging.info("-> Closing gripper to grab fabric")
-            self.gripper_close()
-            time.sleep(0.5)
-            
-            # 3. Move to appropriate placement position based on defect status
-            if defective:
-                logging.info("-> Defective item detected. Moving to Defective Section")
-                self.move_to_position(self.positions["defective"])
-            else:
-                logging.info("-> Non-defective item detected. Moving to Correct Section")
-                self.move_to_position(self.positions["non_defective"])
-                
-            time.sleep(0.5)
-            
-            # 4. Open gripper to release fabric, then close gripper
-            logging.info("-> Opening gripper to release fabric")
-            self.gripper_open()
-            time.sleep(0.5)
-            
-            logging.info("-> Closing gripper after release")
-            self.gripper_close()
-            time.sleep(0.5)
-            
-            # 5. Return to home position with gripper closed
-            logging.info("-> Returning to Home Position")
-            self.move_to_position(self.positions["home"])
-            
-        except Exception as e:
-            logging.error(f"Error in robot movement: {e}")
-        finally:
-            self.is_busy = False
-            self.last_action_time = time.time()
+        """Queue a pick-and-place cycle and return immediately with its Future"""
+        logging.info(f"-> Queuing pick-and-place for {'defective' if defective else 'non-defective'} item")
+        return self.submit(self.pick_and_place_sequence(defective), cycle=True)
+
+    def close(self):
+        """Stop the serial worker after queued commands finish, then close the port"""
+        if self._worker is not None:
+            self.commands.put(None)
+            self._worker.join(timeout=Settings.ARDUINO_ACK_TIMEOUT * 2)
+            self._worker = None
+        if self.arduino is not None:
+            self.arduino.close()
+        stats = self.latency_stats()
+        if stats:
+            logging.info(f"Arduino command latency: {stats}")
 
 # Integrated UI Class
 class IntegratedFabricDetectionApp:
@@ -209,10 +370,15 @@ class IntegratedFabricDetectionApp:
             # Initialize robot arm controller
             self.robot_arm = RobotArmController()
             
-            # Try to open camera with error handling
+            # Try to open camera with error handling (or play back a recorded session)
             try:
-                self.cap = cv2.VideoCapture(Settings.CAMERA_SOURCES[Settings.DEFAULT_CAMERA])
-                if not self.cap.isOpened():
+                if Settings.REPLAY_DIR:
+                    self.cap = ReplayCapture(Settings.REPLAY_DIR, realtime=Settings.REPLAY_REALTIME)
+                else:
+                    self.cap = cv2.VideoCapture(Settings.CAMERA_SOURCES[Settings.DEFAULT_CAMERA])
+                if not self.cap.isOpened() and Settings.REPLAY_DIR:
+                    logging.error(f"No recorded frames in {Settings.REPLAY_DIR}")
+                elif not self.cap.isOpened():
                     logging.error(f"Failed to open camera at {Settings.CAMERA_SOURCES[Settings.DEFAULT_CAMERA]}")
                     # Try fallback camera source
                     if Settings.DEFAULT_CAMERA == 'IP_CAMERA':
@@ -235,6 +401,11 @@ class IntegratedFabricDetectionApp:
             self.detection_threshold = Settings.DETECTION_THRESHOLD
             self.detected_defects = []
             self.auto_mode = False
+            self.recorder = SessionRecorder(Settings.RECORD_DIR) if Settings.RECORD_DIR else None
+            self.scheduler = FrameScheduler(Settings.FRAME_RATE, Settings.LATENCY_BUDGET, Settings.INPUT_SIZES, metrics=METRICS)
+            self.change_gate = ChangeGate(Settings.CHANGE_THRESHOLD, refresh_every=Settings.FORCE_REFRESH_FRAMES)
+            self.last_results = None
+            self.init_tracking()
 
             # --- Initialize Tkinter Root ---
             self.root = tk.Tk()
@@ -255,6 +426,7 @@ class IntegratedFabricDetectionApp:
             # --- Camera Frame ---
             self.camera_label = tk.Label(self.content_frame, bg="black", width=640, height=480)
             self.camera_label.grid(row=0, column=0, padx=10, rowspan=2)
+            self.display = TkDisplay(self.camera_label, (640, 480))
 
             # --- Classification Info Frame ---
             self.info_frame = tk.Frame(self.content_frame, bg="white")
@@ -283,6 +455,10 @@ class IntegratedFabricDetectionApp:
             )
             self.arduino_status.pack(pady=10)
             
+            # Live pipeline timings
+            self.perf_label = tk.Label(self.info_frame, text="", font=("Arial", 10), bg="white", fg="gray")
+            self.perf_label.pack(pady=5)
+            
             # --- Control Frame ---
             self.control_frame = tk.Frame(self.content_frame, bg="white")
             self.control_frame.grid(row=1, column=1, sticky="n", pady=10)
@@ -412,10 +588,19 @@ class IntegratedFabricDetectionApp:
             ).pack(side=tk.LEFT, padx=5)
 
             # --- Status Bar ---
-            self.status_bar = tk.Label(self.root, text=f"Version: {Settings.VERSION}", bd=1, relief=tk.SUNKEN, anchor=tk.W, bg="#d9d9d9")
-            self.status_bar.pack(side="bottom", fill="x")
+            self.status_frame = tk.Frame(self.root, bg="#d9d9d9")
+            self.status_frame.pack(side="bottom", fill="x")
+            self.metrics_bar = tk.Label(self.status_frame, text="", bd=1, relief=tk.SUNKEN, anchor=tk.E, bg="#d9d9d9")
+            self.metrics_bar.pack(side="right")
+            self.status_bar = tk.Label(self.status_frame, text=f"Version: {Settings.VERSION}", bd=1, relief=tk.SUNKEN, anchor=tk.W, bg="#d9d9d9")
+            self.status_bar.pack(side="left", fill="x", expand=True)
 
-            # Start camera frame updates
+            # Load the model in the background, then start the capture/inference threads;
+            # update_frame only renders the newest result on the Tk thread
+            self.detector.load_async()
+            self.pipeline = LivePipeline(getattr(self, 'cap', None), self.process_frame, METRICS).start()
+            self.camera_error_reported = False
+            self.start_metrics_endpoint()
             self.update_frame()
             
         except Exception as e:
@@ -428,8 +613,7 @@ class IntegratedFabricDetectionApp:
     def reconnect_arduino(self):
         """Attempt to reconnect to Arduino with the current port setting"""
         try:
-            if hasattr(self.robot_arm, 'arduino') and self.robot_arm.arm_ready:
-                self.robot_arm.arduino.close()
+            self.robot_arm.close()
             
             Settings.ARDUINO_PORT = self.port_var.get()
             self.robot_arm = RobotArmController()
@@ -456,9 +640,8 @@ class IntegratedFabricDetectionApp:
     def switch_camera(self):
         """Switch between available camera sources"""
         try:
-            # Release current camera
-            if self.cap.isOpened():
-                self.cap.release()
+            # Release current camera (the capture thread idles until a new one is handed over)
+            self.pipeline.capture.replace(None)
             
             # Update settings and try new camera
             new_camera = self.camera_var.get()
@@ -472,73 +655,173 @@ class IntegratedFabricDetectionApp:
                 self.cap = cv2.VideoCapture(0)  # Default fallback
             else:
                 self.update_status(f"Switched to camera: {new_camera}")
+            self.pipeline.capture.replace(self.cap)
                 
         except Exception as e:
             logging.error(f"Error switching camera: {e}")
             self.update_status(f"Error switching camera: {e}")
+
+    def init_tracking(self):
+        """Defect tracks, fabric piece state and the queue of per-piece decisions for the Tk thread"""
+        self.tracker = DefectTracker(Settings.TRACK_IOU, Settings.TRACK_MAX_DISTANCE, Settings.TRACK_MAX_MISSED)
+        self.pieces = PieceTracker(Settings.PIECE_CHANGE_THRESHOLD, Settings.PIECE_SETTLE_FRAMES, Settings.PIECE_DECIDE_FRAMES)
+        self.track_ids = []
+        self.frames_since_full = 0
+        self.decisions = queue.Queue()
+        self.pending_decision = None
+
+    def infer(self, frame, full):
+        """Full-frame inference, or only crops around the active defect tracks"""
+        if full:
+            self.frames_since_full = 0
+            return self.detector.detect(frame, self.scheduler.imgsz)
+        self.frames_since_full += 1
+        METRICS.inc("roi_inference_total")
+        return detect_rois(lambda crops: self.detector.detect_many(crops, Settings.ROI_IMGSZ), frame,
+                           self.tracker.boxes, Settings.ROI_MARGIN, Settings.ROI_MIN_SIZE)
+
+    def process_frame(self, frame, captured_at=None):
+        """Runs on the inference thread: detect, track, filter and draw.
+
+        Returns (frame, detected_defects, detections), with detected_defects None while the
+        model loads; boxes are drawn later at display size. Per-piece defective/good decisions
+        go to self.decisions.
+        """
+        if not self.detector.ready:
+            if self.recorder is not None:
+                self.recorder.write(frame, captured_at=captured_at)
+            return frame, None, None
+
+        # Process the frame with YOLO model, unless it barely differs from the last inferred one.
+        # A piece still waiting for its decision is always inferred, so its defects gather hits.
+        imgsz = self.scheduler.imgsz
+        with METRICS.time("preprocess"):
+            new_piece = self.pieces.observe(frame)
+            forced = new_piece or self.last_results is None or self.pieces.undecided
+            if forced:
+                self.change_gate.reset(frame)
+            infer = forced or self.change_gate.should_infer(frame)
+        if new_piece:
+            self.tracker.reset()
+        if infer:
+            full = new_piece or self.last_results is None or self.frames_since_full + 1 >= Settings.ROI_REFRESH_FRAMES
+            start = time.perf_counter()
+            with METRICS.time("inference"):
+                self.last_results = self.infer(frame, full)
+            if full:
+                self.scheduler.record_inference(time.perf_counter() - start)
+            self.track_ids = self.tracker.update(self.last_results)
+            self.pieces.inferred()
+        else:
+            METRICS.inc("inference_skipped_total")
+        if self.recorder is not None:
+            self.recorder.write(frame, self.last_results, captured_at, imgsz)
+
+        decision = self.pieces.decide(self.tracker, Settings.TRACK_MIN_HITS, self.detection_threshold)
+        if decision is not None:
+            METRICS.inc(f"pieces_{decision}_total")
+            self.decisions.put((self.pieces.piece_id, decision))
+
+        # Threshold and label lookup work on the arrays directly
+        with METRICS.time("postprocess"):
+            keep = self.last_results.confidences >= self.detection_threshold
+            detections = self.last_results[keep]
+            track_ids = [track_id for track_id, kept in zip(self.track_ids, keep.tolist()) if kept]
+            names = [f"{name} #{track_id}" for name, track_id in zip(detections.labels(self.detector.class_names), track_ids)]
+            detected_defects = list(zip(names, detections.confidences.tolist()))
+        return frame, detected_defects, detections
             
     def update_frame(self):
-        """Update the video frame and process detections"""
+        """Render the newest processed frame; capture and inference run on worker threads"""
         if not hasattr(self, 'cap') or not self.cap.isOpened():
             self.update_status("Camera not available")
             self.root.after(1000, self.update_frame)  # Try again after a delay
             return
             
         try:
-            ret, frame = self.cap.read()
-            
-            if not ret:
-                logging.warning("Failed to read from camera")
-                self.update_status("Camera error: No frame captured")
-                self.root.after(100, self.update_frame)  # Try again after a short delay
+            result = self.pipeline.latest()
+            
+            if result is None:
+                # The Tk loop can miss the exact failure count, so report once per outage
+                if self.pipeline.capture.consecutive_failures >= Settings.CAMERA_FAILURE_LIMIT:
+                    if not self.camera_error_reported:
+                        logging.warning("Failed to read from camera")
+                        self.update_status("Camera error: No frame captured")
+                        self.camera_error_reported = True
+                elif self.pipeline.capture.consecutive_failures == 0:
+                    self.camera_error_reported = False
+                self.root.after(self.scheduler.next_delay_ms(), self.update_frame)
                 return
-            
-            # Process the frame with YOLO model
-            results = self.detector.predict(frame)
-            
-            # Draw bounding boxes and get detections
-            self.detected_defects = []
-            for box in results.boxes:
-                conf = float(box.conf[0])
-                if conf >= self.detection_threshold:
-                    cls_id = int(box.cls[0])
-                    cls_name = self.detector.class_names[cls_id]
-                    self.detected_defects.append((cls_name, conf))
-                    
-                    # Draw bounding box
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(frame, f"{cls_name} {conf:.2f}", (x1, y1 - 10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+            self.camera_error_reported = False
+            
+            frame, detected_defects, detections = result.output
+            if detected_defects is None:
+                error = self.detector.lazy_model.error
+                self.class_label.config(text=f"Failed to load YOLO model: {error}" if error else "Loading model...",
+                                        fg="red" if error else "black")
+                self.show_frame(frame)
+                self.root.after(self.scheduler.next_delay_ms(), self.update_frame)
+                return
+
+            self.detected_defects = detected_defects
+            render_start = time.perf_counter()
+            self.scheduler.record_result(self.pipeline.frame_age)
             
             # Update UI with detection results
             if self.detected_defects:
                 defect_text = "Detected Defects:\n" + "\n".join([f"- {name} ({conf:.2f})" for name, conf in self.detected_defects])
                 self.class_label.config(text=defect_text, fg="red")
-                
-                # Auto robot control if enabled
-                if self.auto_mode and time.time() - self.last_detection_time > self.detection_cooldown:
-                    if not self.robot_arm.is_busy and self.robot_arm.arm_ready:
-                        threading.Thread(target=self.robot_arm.handle_object, args=(True,)).start()
-                        self.last_detection_time = time.time()
             else:
                 self.class_label.config(text="No defects detected", fg="green")
-            
-            # Convert frame for Tkinter display
-            frame = cv2.resize(frame, (640, 480))  # Resize for display
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(rgb_frame)
-            img = ImageTk.PhotoImage(image=img)
-            
-            self.camera_label.img = img  # Keep a reference to prevent garbage collection
-            self.camera_label.config(image=img)
+
+            # Auto robot control: one action per fabric piece, from its tracked decision
+            while not self.decisions.empty():
+                piece_id, decision = self.decisions.get_nowait()
+                logging.info(f"Piece {piece_id}: {decision}")
+                if decision == "defective" or Settings.ROUTE_GOOD_PIECES:
+                    self.pending_decision = (piece_id, decision)
+            if not self.auto_mode:
+                self.pending_decision = None
+            elif (self.pending_decision and time.time() - self.last_detection_time > self.detection_cooldown
+                  and not self.robot_arm.is_busy and self.robot_arm.arm_ready):
+                self.robot_arm.handle_object(defective=self.pending_decision[1] == "defective")
+                self.pending_decision = None
+                self.last_detection_time = time.time()
+            
+            self.show_frame(frame, detections)
+            METRICS.observe("render", time.perf_counter() - render_start)
+
+            self.metrics_bar.config(
+                text=f"FPS {METRICS.rate('render'):.1f} | p95 inference {METRICS.p95('inference') * 1000:.0f} ms | "
+                     f"p95 frame age {METRICS.p95('frame_age') * 1000:.0f} ms"
+            )
+            stats = self.pipeline.stats()
+            self.perf_label.config(
+                text=f"Dropped: {stats['dropped']} | Skipped: {self.change_gate.skip_ratio:.0%} | "
+                     f"Budget misses: {self.scheduler.miss_ratio:.0%} | Input {self.scheduler.imgsz} | "
+                     f"Piece #{self.pieces.piece_id}: {self.pieces.decision or 'watching'}"
+                     + (f" | Robot cycle: {self.robot_arm.cycle_times[-1]:.1f} s" if self.robot_arm.cycle_times else "")
+            )
             
         except Exception as e:
             logging.error(f"Error updating frame: {e}")
             self.update_status(f"Frame update error: {e}")
             
         # Schedule the next frame update
-        self.root.after(int(1000 / Settings.FRAME_RATE), self.update_frame)
+        self.root.after(self.scheduler.next_delay_ms(), self.update_frame)
+
+    def show_frame(self, frame, detections=None):
+        """Show a BGR frame with its detections, reusing the display buffers and Tk photo"""
+        self.display.show(frame, detections, self.detector.class_names)
+
+    def start_metrics_endpoint(self):
+        """Serve per-stage metrics for Prometheus (or any HTTP client) if a port is configured"""
+        if Settings.METRICS_PORT:
+            try:
+                METRICS.serve(Settings.METRICS_PORT)
+                logging.info(f"Metrics at http://127.0.0.1:{Settings.METRICS_PORT}/metrics")
+            except OSError as e:
+                logging.warning(f"Metrics endpoint unavailable on port {Settings.METRICS_PORT}: {e}")
 
     def update_status(self, message):
         """Update the status bar with a message"""
@@ -558,7 +841,7 @@ class IntegratedFabricDetectionApp:
             return
             
         if not self.robot_arm.is_busy:
-            threading.Thread(target=self.robot_arm.handle_object, args=(defective,)).start()
+            self.robot_arm.handle_object(defective=defective)
             self.update_status("Manual robot action triggered")
         else:
             self.update_status("Robot arm is busy")
@@ -570,7 +853,7 @@ class IntegratedFabricDetectionApp:
             return
             
         if not self.robot_arm.is_busy:
-            threading.Thread(target=lambda: self.robot_arm.move_to_position(self.robot_arm.positions["home"])).start()
+            self.robot_arm.submit([self.robot_arm.position_command(self.robot_arm.positions["home"])])
             self.update_status("Robot returning to home position")
         else:
             self.update_status("Robot arm is busy")
@@ -583,16 +866,43 @@ class IntegratedFabricDetectionApp:
     def on_closing(self):
         """Handle window closing"""
         try:
+            if hasattr(self, 'pipeline'):
+                self.pipeline.stop()
+                logging.info(f"Pipeline stats: {self.pipeline.stats()}, inference skip ratio {self.change_gate.skip_ratio:.1%}, "
+                             f"scheduler: {self.scheduler.stats()}")
             if hasattr(self, 'cap') and self.cap.isOpened():
                 self.cap.release()
-            if hasattr(self.robot_arm, 'arduino') and self.robot_arm.arm_ready:
-                self.robot_arm.arduino.close()
+            if self.recorder is not None:
+                self.recorder.close()
+            self.robot_arm.close()
+            if Settings.METRICS_FILE:
+                METRICS.dump(Settings.METRICS_FILE)
+            METRICS.close()
             logging.info("Application closed")
             self.root.destroy()
         except Exception as e:
             logging.error(f"Error during application shutdown: {e}")
             self.root.destroy()
 
+def headless_app(scheduler=None):
+    """The app's detection and tracking state without a window, camera or arm, for replays and benchmarks.
+
+    process_frame(frame) runs IntegratedFabricDetectionApp.process_frame; the model is loaded first.
+    """
+    app = types.SimpleNamespace(
+        detector=LiveFabricDefectDetector(),
+        change_gate=ChangeGate(Settings.CHANGE_THRESHOLD, refresh_every=Settings.FORCE_REFRESH_FRAMES),
+        last_results=None,
+        detection_threshold=Settings.DETECTION_THRESHOLD,
+        recorder=None,
+        scheduler=scheduler or FrameScheduler(Settings.FRAME_RATE, Settings.LATENCY_BUDGET, Settings.INPUT_SIZES),
+    )
+    app.infer = lambda frame, full: IntegratedFabricDetectionApp.infer(app, frame, full)
+    app.process_frame = lambda frame, captured_at=None: IntegratedFabricDetectionApp.process_frame(app, frame, captured_at)
+    IntegratedFabricDetectionApp.init_tracking(app)
+    app.detector.model  # Load now so the first frame is not charged for it
+    return app
+
 def main():
     try:
         app = IntegratedFabricDetectionApp()
@@ -0,0 +1,59 @@
+# tests/test_cache.py (Detection cache hits, LRU eviction and invalidation)
+import json
+import types
+from core import cache as cache_module
+from core.cache import DetectionCache
+
+PARAMS = {"conf": 0.5}
+BOXES, CLASSES, CONFIDENCES = [[0.0, 0.0, 10.0, 10.0]], [0], [0.9]
+ENTRY_BYTES = len(json.dumps({"boxes": BOXES, "classes": CLASSES, "confidences": CONFIDENCES}))
+
+def _clock(monkeypatch):
+    # Strictly increasing last_used, so LRU order does not depend on timer resolution
+    ticks = iter(range(1, 10_000))
+    monkeypatch.setattr(cache_module, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+def test_put_get_and_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = DetectionCache(path, "weights-a", PARAMS, max_bytes=1 << 20)
+    assert cache.get("img1") is None and not cache.has("img1")
+    cache.put("img1", BOXES, CLASSES, CONFIDENCES)
+    assert cache.has("img1")
+    assert cache.get("img1") == {"boxes": BOXES, "classes": CLASSES, "confidences": CONFIDENCES}
+    cache.close()
+
+    cache = DetectionCache(path, "weights-a", PARAMS, max_bytes=1 << 20)
+    assert cache.has("img1") and cache.get("img1") is not None
+    assert cache.stats()["bytes"] == ENTRY_BYTES
+    cache.close()
+
+def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    _clock(monkeypatch)
+    # Room for three entries; eviction trims to 90% of the budget, which still holds three
+    cache = DetectionCache(str(tmp_path / "cache.sqlite"), "weights-a", PARAMS, max_bytes=int(3.5 * ENTRY_BYTES))
+    for name in ("img1", "img2", "img3"):
+        cache.put(name, BOXES, CLASSES, CONFIDENCES)
+    cache.get("img1")  # img2 is now the least recently used
+    cache.put("img4", BOXES, CLASSES, CONFIDENCES)
+    assert cache.evictions == 1
+    assert not cache.has("img2") and cache.get("img2") is None
+    assert all(cache.has(name) for name in ("img1", "img3", "img4"))
+    assert cache.stats()["bytes"] == 3 * ENTRY_BYTES
+    cache.close()
+
+def test_new_weights_clear_and_params_change_the_key(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = DetectionCache(path, "weights-a", PARAMS, max_bytes=1 << 20)
+    cache.put("img1", BOXES, CLASSES, CONFIDENCES)
+    cache.close()
+
+    cache = DetectionCache(path, "weights-a", {"conf": 0.25}, max_bytes=1 << 20)
+    assert not cache.has("img1")  # Same weights, other inference params
+    cache.close()
+
+    cache = DetectionCache(path, "weights-b", PARAMS, max_bytes=1 << 20)
+    assert not cache.has("img1") and cache.stats()["bytes"] == 0
+    cache.close()
+    cache = DetectionCache(path, "weights-a", PARAMS, max_bytes=1 << 20)
+    assert cache.get("img1") is None  # Dropped, not just hidden
+    cache.close()
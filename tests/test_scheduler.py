@@ -0,0 +1,34 @@
+# tests/test_scheduler.py (Input size step down/up and latency budget misses)
+from core.scheduler import FrameScheduler
+
+def _feed(scheduler, seconds, count):
+    for _ in range(count):
+        scheduler.record_inference(seconds)
+
+def test_steps_down_when_inference_is_over_the_limit():
+    scheduler = FrameScheduler(10, 0.25, (320, 640), window=4)  # Limit: one 100 ms period
+    assert scheduler.imgsz == 640
+    _feed(scheduler, 0.2, 3)
+    assert scheduler.imgsz == 640  # Window not full yet
+    _feed(scheduler, 0.2, 1)
+    assert scheduler.imgsz == 320
+    _feed(scheduler, 0.2, 4)
+    assert scheduler.imgsz == 320  # Already at the smallest size
+    assert scheduler.size_changes == 1
+
+def test_steps_up_only_with_headroom():
+    scheduler = FrameScheduler(10, 0.25, (640, 320), window=4)
+    _feed(scheduler, 0.2, 4)
+    assert scheduler.imgsz == 320
+    _feed(scheduler, 0.03, 4)  # 4x the cost at 640 would be 120 ms, over the limit
+    assert scheduler.imgsz == 320
+    _feed(scheduler, 0.015, 4)  # 60 ms predicted, within 70% of the limit
+    assert scheduler.imgsz == 640
+    assert scheduler.size_changes == 2
+
+def test_counts_latency_budget_misses():
+    scheduler = FrameScheduler(10, 0.25)
+    for age in (0.1, 0.3, 0.2, 0.5):
+        scheduler.record_result(age)
+    assert scheduler.misses == 2
+    assert scheduler.miss_ratio == 0.5
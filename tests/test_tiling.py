@@ -0,0 +1,29 @@
+# tests/test_tiling.py (Tile layout, class-aware NMS and merging tile detections)
+import numpy as np
+from core.tiling import make_tiles, merge_tile_detections, nms, tile_origins
+
+def test_tiles_cover_the_image_with_overlap():
+    assert tile_origins(500, 640, 128) == [0]
+    assert tile_origins(1000, 640, 128) == [0, 360]
+    tiles = make_tiles(np.zeros((700, 1000, 3), np.uint8), 640, 128)
+    assert [(x0, y0) for x0, y0, _ in tiles] == [(0, 0), (360, 0), (0, 60), (360, 60)]
+    assert all(tile.shape[:2] == (640, 640) for _, _, tile in tiles)
+
+def test_nms_is_class_aware_and_ordered_by_score():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10], [50, 50, 60, 60]], np.float32)
+    scores = np.array([0.6, 0.9, 0.8, 0.7], np.float32)
+    class_ids = np.array([0, 0, 1, 0])
+    # Box 0 is suppressed by the overlapping, higher scoring box 1; box 2 is another class
+    assert nms(boxes, scores, class_ids, 0.5).tolist() == [1, 2, 3]
+    assert nms(np.empty((0, 4), np.float32), np.empty(0), np.empty(0, int), 0.5).size == 0
+
+def test_merge_shifts_tiles_and_drops_border_duplicates():
+    # One defect at x 350..370 seen by the tile at x0=0 and by the tile at x0=340
+    left = (np.array([[350, 20, 370, 40]], np.float32), np.array([0]), np.array([0.8], np.float32))
+    right = (np.array([[10, 20, 30, 40], [100, 100, 120, 120]], np.float32), np.array([0, 1]),
+             np.array([0.9, 0.5], np.float32))
+    boxes, class_ids, confidences = merge_tile_detections([left, right], [(0, 0), (340, 0)], 0.5)
+    assert boxes.tolist() == [[350, 20, 370, 40], [440, 100, 460, 120]]
+    assert class_ids.tolist() == [0, 1]
+    np.testing.assert_allclose(confidences, [0.9, 0.5])
+    assert merge_tile_detections([], [], 0.5)[0].shape == (0, 4)
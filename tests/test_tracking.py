@@ -0,0 +1,94 @@
+# tests/test_tracking.py (Defect tracker and per-piece decisions)
+import logging
+import types
+import numpy as np
+from core.detections import Detections
+from core.gate import ChangeGate
+from core.scheduler import FrameScheduler
+from core.tracking import DefectTracker, PieceTracker, iou_matrix
+
+logging.basicConfig(level=logging.WARNING)  # Before importing robo, so fabric_robot.log is untouched
+import robo  # noqa: E402
+
+def hole(x=100, conf=0.9):
+    return Detections([[x, 100, x + 40, 140]], [0], [conf])
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10], [0, 0, 5, 5]], np.float32)
+    b = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], np.float32)
+    np.testing.assert_allclose(iou_matrix(a, b), [[1.0, 0.0], [0.25, 0.0]])
+
+def test_tracker_keeps_ids_by_iou_and_centroid():
+    tracker = DefectTracker(iou_threshold=0.3, max_distance=50, max_missed=2)
+    assert tracker.update(hole(100)) == [1]
+    assert tracker.update(hole(105)) == [1]  # IoU match
+    assert tracker.update(hole(150)) == [1]  # No overlap, but centroid within 50 px
+    assert tracker.update(Detections([[100, 100, 140, 140]], [1], [0.9])) == [2]  # Other class: new track
+    assert tracker.hits.tolist() == [3, 1]
+    for _ in range(3):
+        tracker.update(Detections.empty())
+    assert len(tracker) == 0
+
+def test_confirmed_uses_mean_confidence():
+    tracker = DefectTracker()
+    for conf in (0.9, 0.3, 0.3):
+        tracker.update(hole(conf=conf))
+    assert not tracker.confirmed(min_hits=3, min_conf=0.6).any()
+    assert tracker.confirmed(min_hits=3, min_conf=0.5).any()
+
+def test_piece_decision_counts_inferences_not_frames():
+    frame = np.full((48, 64, 3), 128, np.uint8)
+    pieces = PieceTracker(settle_frames=2, decide_frames=5)
+    tracker = DefectTracker()
+    decisions = []
+    for i in range(60):
+        pieces.observe(frame)
+        if i % 30 == 0:  # Inference only on rare refreshes: too few hits for either call
+            tracker.update(Detections.empty())
+            pieces.inferred()
+        decisions.append(pieces.decide(tracker, min_hits=3, min_conf=0.6))
+    assert decisions == [None] * 60
+
+    for _ in range(5):
+        tracker.update(Detections.empty())
+        pieces.inferred()
+    assert pieces.decide(tracker, 3, 0.6) == "good"
+    assert pieces.decide(tracker, 3, 0.6) is None  # Only once per piece
+
+def _robo_app(model_output):
+    detector = types.SimpleNamespace(
+        ready=True, class_names=robo.Settings.CLASS_NAMES,
+        detect=lambda frame, imgsz=None: model_output,
+        detect_many=lambda crops, imgsz=None: [Detections.empty() for _ in crops],
+    )
+    app = types.SimpleNamespace(
+        detector=detector, last_results=None, recorder=None,
+        detection_threshold=robo.Settings.DETECTION_THRESHOLD,
+        change_gate=ChangeGate(robo.Settings.CHANGE_THRESHOLD, refresh_every=robo.Settings.FORCE_REFRESH_FRAMES),
+        scheduler=FrameScheduler(robo.Settings.FRAME_RATE, robo.Settings.LATENCY_BUDGET, (640,)),
+    )
+    app.infer = lambda frame, full: robo.IntegratedFabricDetectionApp.infer(app, frame, full)
+    robo.IntegratedFabricDetectionApp.init_tracking(app)
+    return app
+
+def _decisions(app, frames):
+    for frame in frames:
+        robo.IntegratedFabricDetectionApp.process_frame(app, frame.copy())
+    found = []
+    while not app.decisions.empty():
+        found.append(app.decisions.get_nowait())
+    return found
+
+def test_static_defective_piece_is_defective():
+    frame = np.full((480, 640, 3), 128, np.uint8)
+    app = _robo_app(hole(conf=0.9))
+    assert _decisions(app, [frame] * 60) == [(1, "defective")]
+
+def test_static_clean_piece_is_good_and_gate_counts_forced_frames():
+    frame = np.full((480, 640, 3), 128, np.uint8)
+    app = _robo_app(Detections.empty())
+    settle = robo.Settings.PIECE_SETTLE_FRAMES
+    assert _decisions(app, [frame] * (settle + robo.Settings.PIECE_DECIDE_FRAMES + 20)) == [(1, "good")]
+    # Every frame up to the decision was inferred, and counted as such by the gate
+    assert app.change_gate.inferred >= robo.Settings.PIECE_DECIDE_FRAMES
+    assert app.change_gate.skipped <= 20 + settle
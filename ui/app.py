@@ -1,41 +1,71 @@
 # ui/app.py (Tkinter UI and gallery display)
+import queue
+import threading
 import tkinter as tk
-from tkinter import Scrollbar, Canvas, Frame, Label
-from PIL import Image, ImageTk
-from core.model import process_images
-from config.settings import IMAGE_FOLDER
+from ui.gallery import VirtualGallery
+from core.model import iter_detections
+from core.results import ResultStore
+from core.thumbnails import ThumbnailStore
+from config.settings import IMAGE_FOLDER, THUMBNAIL_FOLDER, THUMBNAIL_SIZE, RESULTS_PATH
 
-def run_app():
+POLL_INTERVAL_MS = 50
+MAX_ITEMS_PER_POLL = 100  # Keeps each after() callback short so the window stays responsive
+
+def _produce(folder_path, results, stop):
+    # Runs the detector off the Tk thread; the gallery drains `results` from after() callbacks
+    try:
+        for item in iter_detections(folder_path):
+            if stop.is_set():
+                return
+            results.put(item)
+    except Exception as e:
+        print(f"Error processing images: {e}")
+    finally:
+        results.put(None)
+
+def load_stored(query):
+    # One indexed page from the results store; "latest" resolves to the newest run
+    store = ResultStore(RESULTS_PATH)
+    try:
+        query = dict(query)
+        if query.get("run_id") == "latest":
+            query["run_id"] = store.latest_run()
+        return [(f"{row['class']} {row['confidence']:.2f}", row["output"]) for row in store.query(**query)]
+    finally:
+        store.close()
+
+def run_app(query=None):
+    # With a query ({"obj_class", "min_conf", "run_id", "since", "limit", "offset"}) the gallery
+    # shows stored results without running the model; otherwise it processes IMAGE_FOLDER
     classification_window = tk.Tk()
     classification_window.title("Classified Objects Gallery")
     classification_window.geometry("1800x900")
     
-    canvas = Canvas(classification_window)
-    scrollbar = Scrollbar(classification_window, orient="vertical", command=canvas.yview)
-    scrollable_frame = Frame(canvas)
-    scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-    canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-    canvas.configure(yscrollcommand=scrollbar.set)
-    canvas.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-    
-    image_references = []
-    detected_files = process_images(IMAGE_FOLDER)
-    
-    row, col, max_columns = 0, 0, 5
-    for obj_class, img_path in detected_files:
-        try:
-            img = Image.open(img_path)
-            img = img.resize((250, 250), Image.LANCZOS)
-            img_tk = ImageTk.PhotoImage(image=img)
-            label = Label(scrollable_frame, image=img_tk, text=obj_class, compound="top", font=("Arial", 10, "bold"))
-            label.grid(row=row, column=col, padx=10, pady=10)
-            image_references.append(img_tk)
-            col += 1
-            if col >= max_columns:
-                col = 0
-                row += 1
-        except Exception as e:
-            print(f"Error displaying image for {obj_class}: {e}")
-    
+    thumbnails = ThumbnailStore(THUMBNAIL_FOLDER, THUMBNAIL_SIZE)
+    gallery = VirtualGallery(classification_window, columns=5, thumb_size=THUMBNAIL_SIZE, load=thumbnails.get)
+    results = queue.Queue()
+    stop = threading.Event()
+    if query is None:
+        threading.Thread(target=_produce, args=(IMAGE_FOLDER, results, stop), daemon=True).start()
+    else:
+        for item in load_stored(query):
+            results.put(item)
+        results.put(None)
+
+    def poll():
+        for _ in range(MAX_ITEMS_PER_POLL):
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                classification_window.title(f"Classified Objects Gallery ({len(gallery)} detections)")
+                return
+            obj_class, img_path = item
+            gallery.append(obj_class, img_path)
+        classification_window.after(POLL_INTERVAL_MS, poll)
+
+    classification_window.after(0, poll)
     classification_window.mainloop()
+    stop.set()
+    thumbnails.close()
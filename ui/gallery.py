@@ -0,0 +1,157 @@
+# ui/gallery.py (Virtualized thumbnail grid)
+from collections import OrderedDict
+from tkinter import Scrollbar, Canvas
+from PIL import ImageTk
+from core.thumbnails import decode_reduced
+
+class ThumbnailLRU:
+    """Bounded cache of decoded PIL thumbnails, least recently used dropped first."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key):
+        if key in self.items:
+            self.items.move_to_end(key)
+            return self.items[key]
+        return None
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+class VirtualGallery:
+    """Grid of (label, image path) items drawn on a Canvas with a small pool of reused cells.
+
+    Only rows in view (plus `overscan_rows` above and below) hold a PhotoImage; cells that
+    scroll out are recycled and their images released. Decoded thumbnails are kept in a
+    bounded LRU so scrolling back does not decode again.
+    """
+
+    def __init__(self, parent, columns=5, thumb_size=(250, 250), padding=10, overscan_rows=1,
+                 cache_size=200, decodes_per_pass=4, load=decode_reduced):
+        self.columns = columns
+        self.thumb_size = thumb_size
+        self.cell_width = thumb_size[0] + 2 * padding
+        self.cell_height = thumb_size[1] + 2 * padding + 20
+        self.padding = padding
+        self.overscan_rows = overscan_rows
+        self.decodes_per_pass = decodes_per_pass
+        self.load = load
+        self.thumbnails = ThumbnailLRU(cache_size)
+        self.items = []
+        self.visible = {}  # item index -> cell
+        self.free_cells = []
+        self.refresh_pending = False
+
+        self.canvas = Canvas(parent, highlightthickness=0)
+        self.scrollbar = Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.bind("<Configure>", lambda e: self.schedule_refresh())
+        self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind_all("<Button-4>", lambda e: self._scroll(-1))
+        self.canvas.bind_all("<Button-5>", lambda e: self._scroll(1))
+
+    def __len__(self):
+        return len(self.items)
+
+    def append(self, label, img_path):
+        self.items.append((label, img_path))
+        rows = (len(self.items) + self.columns - 1) // self.columns
+        self.canvas.configure(scrollregion=(0, 0, self.columns * self.cell_width, rows * self.cell_height))
+        self.schedule_refresh()
+
+    def _on_scrollbar(self, *args):
+        self.canvas.yview(*args)
+        self.schedule_refresh()
+
+    def _on_mousewheel(self, event):
+        self._scroll(-1 if event.delta > 0 else 1)
+
+    def _scroll(self, units):
+        self.canvas.yview_scroll(units, "units")
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.canvas.after_idle(self.refresh)
+
+    def visible_range(self):
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.cell_height)
+        first_row = max(int(top // self.cell_height) - self.overscan_rows, 0)
+        last_row = int((top + height) // self.cell_height) + self.overscan_rows
+        return first_row * self.columns, min((last_row + 1) * self.columns, len(self.items))
+
+    def refresh(self):
+        self.refresh_pending = False
+        start, stop = self.visible_range()
+
+        for index in [index for index in self.visible if not start <= index < stop]:
+            self._release(self.visible.pop(index))
+
+        decodes = 0
+        for index in range(start, stop):
+            cell = self.visible.get(index)
+            if cell is None:
+                cell = self._acquire()
+                self._place(cell, index)
+                self.visible[index] = cell
+            if cell["photo"] is None and not cell["failed"]:
+                if decodes >= self.decodes_per_pass and self.thumbnails.get(self.items[index][1]) is None:
+                    continue
+                decodes += self._show_thumbnail(cell, index)
+
+        if any(cell["photo"] is None and not cell["failed"] for cell in self.visible.values()):
+            self.canvas.after(1, self.schedule_refresh)  # Decode the rest without blocking the event loop
+
+    def _acquire(self):
+        if self.free_cells:
+            cell = self.free_cells.pop()
+            self.canvas.itemconfigure(cell["image"], state="normal")
+            self.canvas.itemconfigure(cell["text"], state="normal")
+            return cell
+        return {
+            "image": self.canvas.create_image(0, 0, anchor="nw"),
+            "text": self.canvas.create_text(0, 0, anchor="n", font=("Arial", 10, "bold")),
+            "photo": None,
+            "failed": False,
+        }
+
+    def _place(self, cell, index):
+        row, col = divmod(index, self.columns)
+        x, y = col * self.cell_width + self.padding, row * self.cell_height + self.padding
+        self.canvas.coords(cell["text"], x + self.thumb_size[0] // 2, y)
+        self.canvas.coords(cell["image"], x, y + 20)
+        self.canvas.itemconfigure(cell["text"], text=self.items[index][0])
+        self.canvas.itemconfigure(cell["image"], image="")
+
+    def _release(self, cell):
+        self.canvas.itemconfigure(cell["image"], image="", state="hidden")
+        self.canvas.itemconfigure(cell["text"], state="hidden")
+        cell["photo"] = None
+        cell["failed"] = False
+        self.free_cells.append(cell)
+
+    def _show_thumbnail(self, cell, index):
+        label, img_path = self.items[index]
+        thumbnail = self.thumbnails.get(img_path)
+        decoded = 0
+        if thumbnail is None:
+            try:
+                thumbnail = self.load(img_path, self.thumb_size)
+            except Exception as e:
+                print(f"Error displaying image for {label}: {e}")
+                cell["failed"] = True
+                return 1
+            self.thumbnails.put(img_path, thumbnail)
+            decoded = 1
+        cell["photo"] = ImageTk.PhotoImage(image=thumbnail)
+        self.canvas.itemconfigure(cell["image"], image=cell["photo"])
+        return decoded